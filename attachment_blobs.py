@@ -0,0 +1,82 @@
+from typing import Optional, Tuple
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from models import AttachmentBlob, InflowEntryAttachment
+
+# Device uploads are stored once per company and content: spool_upload hashes
+# the bytes, and the upload worker PUTs them under blob_storage_key only if no
+# attachment_blobs row has that hash yet. ref_count counts the attachments
+# pointing at a blob; every endpoint that deletes attachments must call
+# release_attachment_blobs first (company deletes drop the blobs by cascade).
+# Objects are not deleted when ref_count reaches 0, so an identical upload
+# later still skips the PUT.
+
+
+def blob_folder(company_id: int) -> str:
+    return f"inflow/{company_id}/blobs"
+
+
+def blob_storage_key(company_id: int, sha256: str) -> str:
+    return f"{blob_folder(company_id)}/{sha256}"
+
+
+def entry_storage_folders(company_id: int, inflow_form_id: int) -> Tuple[str, str]:
+    """
+    Folders an entry's attachment keys may be in: its form's folder and its company's blobs
+    """
+    return f"inflow/{company_id}/{inflow_form_id}", blob_folder(company_id)
+
+
+def find_blob(db, company_id: int, sha256: str) -> Optional[AttachmentBlob]:
+    return db.execute(
+        select(AttachmentBlob).where(AttachmentBlob.company_id == company_id, AttachmentBlob.sha256 == sha256)
+    ).scalar_one_or_none()
+
+
+def reference_blob(db, company_id: int, sha256: str, storage_key: str, size: int) -> int:
+    """
+    Add one reference to the blob, creating it with the given object if it does
+    not exist yet, and return its id
+
+    A single upsert, so two workers storing the same bytes at once both count.
+    """
+    table = AttachmentBlob.__table__
+    values = {"company_id": company_id, "sha256": sha256, "storage_key": storage_key, "size": size, "ref_count": 1}
+    stmt = mysql_insert(table).values(values)
+    db.execute(stmt.on_duplicate_key_update(ref_count=table.c.ref_count + 1))
+    return db.execute(
+        select(table.c.id).where(table.c.company_id == company_id, table.c.sha256 == sha256)
+    ).scalar_one()
+
+
+def set_blob_renditions(db, blob_id: int, preview_key: Optional[str], thumbnail_key: str):
+    """
+    Record a blob's image renditions, unless another worker already did
+    """
+    db.execute(
+        update(AttachmentBlob)
+        .where(AttachmentBlob.id == blob_id, AttachmentBlob.thumbnail_key.is_(None))
+        .values(preview_key=preview_key, thumbnail_key=thumbnail_key)
+    )
+
+
+def release_attachment_blobs(db, *criteria):
+    """
+    Drop the blob references of the attachments matching criteria (before deleting them)
+    """
+    db.flush()
+    released = db.execute(
+        select(InflowEntryAttachment.blob_id, func.count(InflowEntryAttachment.id))
+        .where(InflowEntryAttachment.blob_id.isnot(None), *criteria)
+        .group_by(InflowEntryAttachment.blob_id)
+    ).all()
+    if released:
+        table = AttachmentBlob.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(ref_count=table.c.ref_count - bindparam("b_count")),
+            [{"b_id": blob_id, "b_count": count} for blob_id, count in released]
+        )
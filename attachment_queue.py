@@ -0,0 +1,341 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import BinaryIO, Iterable, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+
+from attachment_blobs import blob_storage_key, find_blob, reference_blob, set_blob_renditions
+from database import SessionLocal
+from image_renditions import is_renderable_image, render_image_in_pool
+from models import AttachmentStatusEnum, InflowEntryAttachment, InflowEntryPayload
+from railway_storage import RAILWAY_MULTIPART_CHUNK_SIZE, put_file_to_railway
+
+# Background uploads of transaction attachments. The transaction endpoints copy
+# each file into ATTACHMENT_SPOOL_DIR, commit the attachment as PENDING and
+# enqueue its id; a worker thread uploads it to Railway Storage and marks it
+# UPLOADED, or retries with backoff and finally marks it FAILED. Spooled files
+# live on local disk, so PENDING attachments are re-enqueued at startup.
+# Each attempt holds a lease (claimed_at) while it runs; only the attempt that
+# holds it may write the outcome.
+# Files are hashed while spooled and stored once per company and content
+# (see attachment_blobs.py). Image attachments also get a preview and a
+# thumbnail (see image_renditions.py).
+
+ATTACHMENT_SPOOL_DIR = os.getenv(
+    "ATTACHMENT_SPOOL_DIR",
+    os.path.join(tempfile.gettempdir(), "cashflow-attachments")
+)
+ATTACHMENT_UPLOAD_WORKERS = int(os.getenv("ATTACHMENT_UPLOAD_WORKERS", "4"))
+ATTACHMENT_UPLOAD_MAX_ATTEMPTS = int(os.getenv("ATTACHMENT_UPLOAD_MAX_ATTEMPTS", "5"))
+# Delay before retry n is ATTACHMENT_RETRY_DELAY * 2 ** (n - 1) seconds, at most 5 minutes
+ATTACHMENT_RETRY_DELAY = float(os.getenv("ATTACHMENT_RETRY_DELAY", "2"))
+_MAX_RETRY_DELAY = 300
+# An attempt's claim on an attachment lapses after this many seconds (it is
+# released early when a retry is scheduled), so uploads of a process that died
+# mid-attempt are picked up again at the next startup
+ATTACHMENT_CLAIM_TIMEOUT = int(os.getenv("ATTACHMENT_CLAIM_TIMEOUT", "900"))
+# Spooled files older than this with no PENDING/FAILED attachment are removed at startup
+_ORPHAN_SPOOL_AGE_SECONDS = 3600
+
+_worker_pool = ThreadPoolExecutor(
+    max_workers=ATTACHMENT_UPLOAD_WORKERS,
+    thread_name_prefix="attachment-upload"
+)
+
+
+def spool_upload(fileobj: BinaryIO, file_name: str) -> Tuple[str, str]:
+    """
+    Copy an uploaded file into the spool directory in chunks, hashing it on the
+    way, and return its path and SHA-256 hex digest
+    """
+    os.makedirs(ATTACHMENT_SPOOL_DIR, exist_ok=True)
+    spool_path = os.path.join(ATTACHMENT_SPOOL_DIR, f"{uuid.uuid4().hex}{os.path.splitext(file_name)[1]}")
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    with open(spool_path, "wb") as out:
+        while True:
+            chunk = fileobj.read(RAILWAY_MULTIPART_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return spool_path, digest.hexdigest()
+
+
+def discard_spooled(spool_path: Optional[str]):
+    if spool_path:
+        try:
+            os.remove(spool_path)
+        except FileNotFoundError:
+            pass
+
+
+def enqueue_attachments(attachment_ids: Iterable[int], delay: float = 0):
+    """
+    Hand committed PENDING attachments to the upload workers, after delay seconds
+    """
+    attachment_ids = list(attachment_ids)
+    if not attachment_ids:
+        return
+    if delay > 0:
+        timer = threading.Timer(delay, enqueue_attachments, args=(attachment_ids,))
+        timer.daemon = True
+        timer.start()
+        return
+    for attachment_id in attachment_ids:
+        _worker_pool.submit(process_attachment, attachment_id)
+
+
+def _bump_entry_version(db, entry_id: int):
+    # Attachment state is part of the entry as listed, so its ETag must change
+    db.execute(
+        update(InflowEntryPayload)
+        .where(InflowEntryPayload.id == entry_id)
+        .values(version=InflowEntryPayload.version + 1)
+    )
+
+
+def _store_image_renditions(spool_path: str, storage_key: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Render an image's preview and thumbnail and upload them next to the original
+
+    Returns their keys, or (None, None) if rendering or uploading them failed;
+    the attachment itself is uploaded either way.
+    """
+    rendered = []
+    try:
+        preview_path, thumbnail_path = render_image_in_pool(spool_path)
+        rendered = [path for path in (preview_path, thumbnail_path) if path]
+        preview_key = None
+        if preview_path:
+            with open(preview_path, "rb") as preview:
+                preview_key = put_file_to_railway(preview, "preview.jpg", storage_path=f"{storage_key}.preview.jpg")
+        with open(thumbnail_path, "rb") as thumbnail:
+            thumbnail_key = put_file_to_railway(thumbnail, "thumbnail.jpg", storage_path=f"{storage_key}.thumbnail.jpg")
+        return preview_key, thumbnail_key
+    except Exception as e:
+        print(f"⚠ Could not create image renditions for {storage_key}: {str(e)}")
+        return None, None
+    finally:
+        for path in rendered:
+            discard_spooled(path)
+
+
+def _lease_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=ATTACHMENT_CLAIM_TIMEOUT)
+
+
+def _finish_attempt(db, attachment_id: int, attempt: int, **values) -> bool:
+    """
+    Write an attempt's outcome, only if that attempt still holds the attachment
+
+    Returns False (nothing written) if the attachment is no longer PENDING or a
+    later attempt has claimed it.
+    """
+    return db.execute(
+        update(InflowEntryAttachment)
+        .where(
+            InflowEntryAttachment.id == attachment_id,
+            InflowEntryAttachment.status == AttachmentStatusEnum.PENDING,
+            InflowEntryAttachment.attempts == attempt,
+        )
+        .values(**values)
+    ).rowcount == 1
+
+
+def process_attachment(attachment_id: int):
+    """
+    Make one upload attempt for a PENDING attachment
+
+    The attempt is claimed by bumping attempts and setting claimed_at with a
+    compare-and-set that also requires no live lease, so an attachment enqueued
+    twice (or by two processes) is only worked on by one attempt at a time, and
+    every outcome is written with _finish_attempt.
+    """
+    db = SessionLocal()
+    claimed_attempt = None
+    try:
+        attachment = db.get(InflowEntryAttachment, attachment_id)
+        if attachment is None or attachment.status != AttachmentStatusEnum.PENDING:
+            return
+        attempt = attachment.attempts + 1
+        claimed = db.execute(
+            update(InflowEntryAttachment)
+            .where(
+                InflowEntryAttachment.id == attachment_id,
+                InflowEntryAttachment.status == AttachmentStatusEnum.PENDING,
+                InflowEntryAttachment.attempts == attachment.attempts,
+                or_(InflowEntryAttachment.claimed_at.is_(None), InflowEntryAttachment.claimed_at < _lease_cutoff()),
+            )
+            .values(attempts=attempt, claimed_at=datetime.utcnow())
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return
+        claimed_attempt = attempt
+        db.refresh(attachment)
+
+        entry = db.get(InflowEntryPayload, attachment.inflow_entry_id)
+        storage_key = None
+        deduplicated = False
+        error = None
+        retryable = True
+        if not attachment.spool_path or not os.path.exists(attachment.spool_path):
+            error = "Spooled file is missing (lost on restart or redeploy); upload the file again"
+            retryable = False
+        else:
+            sha256 = attachment.content_sha256
+            blob = find_blob(db, entry.company_id, sha256) if sha256 else None
+            if blob is not None:
+                # Same bytes already stored for this company: no PUT
+                storage_key = blob.storage_key
+                deduplicated = True
+            else:
+                try:
+                    with open(attachment.spool_path, "rb") as spooled:
+                        storage_key = put_file_to_railway(
+                            file_content=spooled,
+                            file_name=attachment.file_name or os.path.basename(attachment.spool_path),
+                            folder=f"inflow/{entry.company_id}/{entry.inflow_form_id}",
+                            # Attachments spooled before hashing keep a unique key
+                            storage_path=blob_storage_key(entry.company_id, sha256) if sha256 else None
+                        )
+                except Exception as upload_error:
+                    error = str(upload_error)
+
+        if storage_key:
+            spool_path = attachment.spool_path
+            preview_key = thumbnail_key = None
+            if deduplicated and blob.thumbnail_key:
+                preview_key, thumbnail_key = blob.preview_key, blob.thumbnail_key
+            elif is_renderable_image(attachment.file_name or spool_path):
+                preview_key, thumbnail_key = _store_image_renditions(spool_path, storage_key)
+            uploaded = _finish_attempt(
+                db, attachment_id, attempt,
+                storage_key=storage_key,
+                status=AttachmentStatusEnum.UPLOADED,
+                spool_path=None,
+                last_error=None,
+                claimed_at=None,
+                preview_key=preview_key,
+                thumbnail_key=thumbnail_key,
+            )
+            if not uploaded:
+                db.rollback()
+                print(f"⚠ Attachment {attachment_id} changed during attempt {attempt}; result discarded")
+                return
+            if attachment.content_sha256:
+                blob_id = reference_blob(
+                    db, entry.company_id, attachment.content_sha256, storage_key, os.path.getsize(spool_path)
+                )
+                db.execute(
+                    update(InflowEntryAttachment)
+                    .where(InflowEntryAttachment.id == attachment_id)
+                    .values(blob_id=blob_id)
+                )
+                if thumbnail_key:
+                    set_blob_renditions(db, blob_id, preview_key, thumbnail_key)
+            _bump_entry_version(db, attachment.inflow_entry_id)
+            db.commit()
+            discard_spooled(spool_path)
+            if deduplicated:
+                print(f"✓ Attachment {attachment_id} ({attachment.file_name}) matches a stored file, upload skipped")
+            else:
+                print(f"✓ Uploaded attachment {attachment_id} ({attachment.file_name}) on attempt {attempt}")
+            return
+
+        if retryable and attempt < ATTACHMENT_UPLOAD_MAX_ATTEMPTS:
+            # Release the lease so the retry (here or in another process) can claim it
+            if not _finish_attempt(db, attachment_id, attempt, last_error=error, claimed_at=None):
+                db.rollback()
+                return
+            db.commit()
+            delay = min(ATTACHMENT_RETRY_DELAY * 2 ** (attempt - 1), _MAX_RETRY_DELAY)
+            print(f"⚠ Upload of attachment {attachment_id} failed (attempt {attempt}), retrying in {delay:.0f}s: {error}")
+            enqueue_attachments([attachment_id], delay=delay)
+            return
+        if not _finish_attempt(
+            db, attachment_id, attempt, status=AttachmentStatusEnum.FAILED, last_error=error, claimed_at=None
+        ):
+            db.rollback()
+            return
+        _bump_entry_version(db, attachment.inflow_entry_id)
+        db.commit()
+        print(f"✗ Upload of attachment {attachment_id} failed after {attempt} attempt(s): {error}")
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Error processing attachment {attachment_id}: {str(e)}")
+        if claimed_attempt is not None:
+            _recover_claimed_attempt(db, attachment_id, claimed_attempt, str(e))
+    finally:
+        db.close()
+
+
+def _recover_claimed_attempt(db, attachment_id: int, attempt: int, error: str):
+    """
+    Retry (or fail) an attempt that broke outside the upload itself, so the
+    attachment is not left PENDING with nothing scheduled
+    """
+    retry = attempt < ATTACHMENT_UPLOAD_MAX_ATTEMPTS
+    try:
+        if retry:
+            finished = _finish_attempt(db, attachment_id, attempt, last_error=error, claimed_at=None)
+        else:
+            finished = _finish_attempt(
+                db, attachment_id, attempt, status=AttachmentStatusEnum.FAILED, last_error=error, claimed_at=None
+            )
+            if finished:
+                entry_id = db.execute(
+                    select(InflowEntryAttachment.inflow_entry_id).where(InflowEntryAttachment.id == attachment_id)
+                ).scalar_one()
+                _bump_entry_version(db, entry_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        # The lease lapses after ATTACHMENT_CLAIM_TIMEOUT and the next startup picks it up
+        print(f"✗ Could not record the failed attempt of attachment {attachment_id}: {str(e)}")
+        return
+    if finished and retry:
+        enqueue_attachments([attachment_id], delay=min(ATTACHMENT_RETRY_DELAY * 2 ** (attempt - 1), _MAX_RETRY_DELAY))
+
+
+def requeue_pending_attachments():
+    """
+    Enqueue every PENDING attachment no attempt holds, and remove orphaned spooled files
+
+    Run at startup: uploads whose process stopped mid-attempt (lease older than
+    ATTACHMENT_CLAIM_TIMEOUT) or while waiting for a retry resume from their
+    spooled files. Attachments another live process is uploading are left to it.
+    """
+    db = SessionLocal()
+    try:
+        pending_ids = db.execute(
+            select(InflowEntryAttachment.id)
+            .where(
+                InflowEntryAttachment.status == AttachmentStatusEnum.PENDING,
+                or_(InflowEntryAttachment.claimed_at.is_(None), InflowEntryAttachment.claimed_at < _lease_cutoff()),
+            )
+            .order_by(InflowEntryAttachment.id)
+        ).scalars().all()
+        kept = set(db.execute(
+            select(InflowEntryAttachment.spool_path).where(InflowEntryAttachment.spool_path.isnot(None))
+        ).scalars())
+    finally:
+        db.close()
+
+    if os.path.isdir(ATTACHMENT_SPOOL_DIR):
+        cutoff = time.time() - _ORPHAN_SPOOL_AGE_SECONDS
+        for name in os.listdir(ATTACHMENT_SPOOL_DIR):
+            path = os.path.join(ATTACHMENT_SPOOL_DIR, name)
+            if path not in kept and os.path.getmtime(path) < cutoff:
+                discard_spooled(path)
+
+    if pending_ids:
+        print(f"✓ Re-enqueued {len(pending_ids)} pending attachment upload(s)")
+    enqueue_attachments(pending_ids)
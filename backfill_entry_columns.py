@@ -0,0 +1,127 @@
+"""
+Backfill the derived amount / txn_date / search_text columns of inflow_entry_payloads from payload JSON
+
+Walks the table in primary-key order, one chunk per transaction, and records the
+last processed id in a checkpoint file so an interrupted run resumes where it
+stopped; the checkpoint is removed after a complete pass. The columns are added by migrations 0002 and 0005; run `python migrate.py` first.
+
+Only rows with an empty derived column are visited unless --recompute is given
+(e.g. after adding TEXT fields to a form whose entries should become searchable);
+--recompute always starts from the first row unless --start-after-id is given.
+
+Usage:
+    python backfill_entry_columns.py [--batch-size 1000] [--start-after-id N] [--checkpoint-file PATH] [--recompute]
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import selectinload
+
+from database import SessionLocal
+from models import InflowEntryPayload, InflowForm
+from payload_fields import build_search_text, extract_amount_and_txn_date
+
+DEFAULT_CHECKPOINT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".backfill_entry_columns.checkpoint")
+
+
+def read_checkpoint(path: str) -> int:
+    if os.path.exists(path):
+        with open(path) as f:
+            value = f.read().strip()
+            if value:
+                return int(value)
+    return 0
+
+
+def write_checkpoint(path: str, last_id: int):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(last_id))
+    os.replace(tmp_path, path)
+
+
+def clear_checkpoint(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def backfill(batch_size: int, start_after_id: int, checkpoint_file: str, recompute: bool = False):
+    db = SessionLocal()
+    try:
+        # Form field definitions are read once and reused for every chunk
+        forms = db.query(InflowForm).options(selectinload(InflowForm.fields)).all()
+        fields_by_form = {form.id: list(form.fields) for form in forms}
+
+        last_id = start_after_id
+        scanned = 0
+        updated = 0
+        started = time.monotonic()
+        pending = [] if recompute else [
+            or_(
+                InflowEntryPayload.amount.is_(None),
+                InflowEntryPayload.txn_date.is_(None),
+                InflowEntryPayload.search_text.is_(None),
+            )
+        ]
+        while True:
+            rows = db.execute(
+                select(
+                    InflowEntryPayload.id,
+                    InflowEntryPayload.inflow_form_id,
+                    InflowEntryPayload.payload,
+                    InflowEntryPayload.amount,
+                    InflowEntryPayload.txn_date,
+                    InflowEntryPayload.search_text,
+                )
+                .where(InflowEntryPayload.id > last_id, *pending)
+                .order_by(InflowEntryPayload.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            changes = []
+            for row in rows:
+                fields = fields_by_form.get(row.inflow_form_id, [])
+                amount, txn_date = extract_amount_and_txn_date(row.payload, fields)
+                search_text = build_search_text(row.payload, fields)
+                if (amount, txn_date, search_text) != (row.amount, row.txn_date, row.search_text):
+                    changes.append({"id": row.id, "amount": amount, "txn_date": txn_date, "search_text": search_text})
+            if changes:
+                db.execute(update(InflowEntryPayload), changes)
+            db.commit()
+
+            last_id = rows[-1].id
+            scanned += len(rows)
+            updated += len(changes)
+            write_checkpoint(checkpoint_file, last_id)
+            elapsed = time.monotonic() - started
+            print(f"✓ Up to id {last_id}: scanned {scanned}, updated {updated} ({scanned / elapsed:.0f} rows/s)")
+        clear_checkpoint(checkpoint_file)
+        print(f"Backfill complete: scanned {scanned}, updated {updated}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Backfill inflow entry amount / txn_date / search_text columns")
+    arg_parser.add_argument("--batch-size", type=int, default=1000, help="Rows per chunk (one transaction each)")
+    arg_parser.add_argument("--start-after-id", type=int, default=None, help="Ignore the checkpoint and start after this id")
+    arg_parser.add_argument("--checkpoint-file", default=DEFAULT_CHECKPOINT_FILE, help="Where the last processed id is stored")
+    arg_parser.add_argument("--recompute", action="store_true", help="Recompute every row, not only rows with empty columns")
+    args = arg_parser.parse_args()
+
+    if args.start_after_id is not None:
+        start = args.start_after_id
+    elif args.recompute:
+        start = 0
+    else:
+        start = read_checkpoint(args.checkpoint_file)
+    if start:
+        print(f"Resuming after id {start}")
+    backfill(args.batch_size, start, args.checkpoint_file, args.recompute)
@@ -0,0 +1,116 @@
+import csv
+import io
+import os
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, List, Tuple
+
+from payload_fields import build_search_text, extract_amount_and_txn_date, validate_payload
+
+# Rows inserted per transaction (one executemany each) by /api/add-transactions/bulk
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "1000"))
+# Largest import accepted in one request
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "50000"))
+# Entries changed per transaction by the bulk delete / edit endpoints
+BULK_MUTATION_CHUNK_SIZE = int(os.getenv("BULK_MUTATION_CHUNK_SIZE", "1000"))
+
+
+def parse_csv_rows(content: bytes) -> List[dict]:
+    """
+    Parse a CSV upload into payload dicts keyed by the header row
+
+    Empty cells are left out of the payload; values are kept as strings.
+
+    Raises:
+        ValueError if the file is not UTF-8 CSV with a header row
+    """
+    text = content.decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(text))
+    try:
+        if not reader.fieldnames:
+            raise ValueError("CSV file has no header row")
+        records = list(reader)
+    except csv.Error as e:
+        raise ValueError(str(e))
+    rows = []
+    for record in records:
+        payload = {}
+        for key, value in record.items():
+            if key is None or value is None:
+                continue
+            key = key.strip()
+            value = value.strip() if isinstance(value, str) else value
+            if key and value != "":
+                payload[key] = value
+        rows.append(payload)
+    return rows
+
+
+def prepare_entry_rows(
+    payloads: Iterable,
+    company_id: int,
+    inflow_form_id: int,
+    fields,
+    created_at: datetime,
+) -> Tuple[List[Tuple[int, dict]], List[dict]]:
+    """
+    Validate payloads and build inflow_entry_payloads rows for an executemany insert
+
+    Args:
+        payloads: Payload objects, in request order
+        fields: Sorted fields of the target form
+        created_at: Timestamp stored on every row (read from the database clock
+            so the rollup day matches DATE(created_at))
+
+    Returns:
+        ([(row_number, row), ...], [{"row": row_number, "errors": [...]}, ...])
+        with 1-based row numbers
+    """
+    rows = []
+    errors = []
+    for row_number, payload in enumerate(payloads, start=1):
+        if not isinstance(payload, dict):
+            errors.append({"row": row_number, "errors": [f"Row must be a JSON object, got {type(payload).__name__}"]})
+            continue
+        row_errors = validate_payload(payload, fields)
+        if row_errors:
+            errors.append({"row": row_number, "errors": row_errors})
+            continue
+        amount, txn_date = extract_amount_and_txn_date(payload, fields)
+        rows.append((row_number, {
+            "company_id": company_id,
+            "inflow_form_id": inflow_form_id,
+            "payload": payload,
+            "mode": payload.get("mode"),
+            "bank_name": payload.get("bank_name"),
+            "bank_account_number": payload.get("bank_account_number"),
+            "amount": amount,
+            "txn_date": txn_date,
+            "search_text": build_search_text(payload, fields),
+            "created_at": created_at,
+        }))
+    return rows, errors
+
+
+def rollup_rows_for(rows: Iterable[dict]) -> List[dict]:
+    """
+    Aggregate entry rows into cashflow_daily_rollup deltas (see rollup.py)
+    """
+    totals = defaultdict(lambda: [Decimal("0"), 0])
+    for row in rows:
+        day = row["txn_date"] or row["created_at"].date()
+        key = (row["company_id"], row["inflow_form_id"], row["mode"] or "", day)
+        totals[key][0] += row["amount"] or Decimal("0")
+        totals[key][1] += 1
+    return [
+        {
+            "company_id": company_id,
+            "inflow_form_id": inflow_form_id,
+            "mode": mode,
+            "day": day,
+            "total_amount": total_amount,
+            "entry_count": entry_count,
+        }
+        for (company_id, inflow_form_id, mode, day), (total_amount, entry_count) in totals.items()
+    ]
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import product
+from typing import Optional
+
+# Seconds a cached flow-entry count is trusted before it is recomputed.
+# Bounds staleness when other workers write entries this process never sees.
+FLOW_ENTRY_COUNT_CACHE_TTL = int(os.getenv("FLOW_ENTRY_COUNT_CACHE_TTL", "300"))
+
+# Form definitions cache (see form_cache.py). Forms change rarely; the TTL bounds
+# how long other workers can serve a form after it was edited elsewhere.
+FORM_CACHE_TTL = int(os.getenv("FORM_CACHE_TTL", "300"))
+FORM_CACHE_MAX_ENTRIES = int(os.getenv("FORM_CACHE_MAX_ENTRIES", "1000"))
+
+
+class EntryCountCache:
+    """
+    In-process cache of inflow entry totals for /api/flow-entries
+
+    Keys are (company_id, inflow_form_id, mode) exactly as filtered by the
+    listing, with None meaning "not filtered". Write paths keep cached totals
+    exact by calling increment() / invalidate() after they commit.
+    """
+
+    def __init__(self, ttl_seconds: int = FLOW_ENTRY_COUNT_CACHE_TTL):
+        self._ttl = ttl_seconds
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """
+        Bumped on every write; pass to set() so a count computed while a
+        write was in flight is not cached
+        """
+        return self._generation
+
+    def get(self, key) -> Optional[int]:
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is None:
+                return None
+            count, stored_at = cached
+            if time.monotonic() - stored_at > self._ttl:
+                del self._counts[key]
+                return None
+            return count
+
+    def set(self, key, count: int, generation: int) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self._counts[key] = (count, time.monotonic())
+
+    @staticmethod
+    def _matching_keys(company_id, inflow_form_id, mode):
+        # An entry is counted under every key whose filters it satisfies
+        return product((company_id, None), (inflow_form_id, None), (mode, None))
+
+    def increment(self, company_id, inflow_form_id, mode, delta: int = 1) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in self._matching_keys(company_id, inflow_form_id, mode):
+                cached = self._counts.get(key)
+                if cached is not None:
+                    self._counts[key] = (max(cached[0] + delta, 0), cached[1])
+
+    def decrement(self, company_id, inflow_form_id, mode) -> None:
+        self.increment(company_id, inflow_form_id, mode, delta=-1)
+
+    def invalidate(self, company_id, inflow_form_id, mode) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in self._matching_keys(company_id, inflow_form_id, mode):
+                self._counts.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._counts.clear()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after ttl_seconds
+
+    Counts hits and misses for stats(). Like EntryCountCache, set() takes the
+    generation read before loading so a value loaded while clear() ran is dropped.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and time.monotonic() - cached[1] > self._ttl:
+                del self._entries[key]
+                cached = None
+            if cached is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached[0]
+
+    def set(self, key, value, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "ttl_seconds": self._ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+entry_count_cache = EntryCountCache()
+form_cache = TTLCache(FORM_CACHE_TTL, FORM_CACHE_MAX_ENTRIES)
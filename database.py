@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from contextvars import ContextVar
 import os
 
 # MySQL database connection string
@@ -22,8 +24,54 @@ engine = create_engine(
     echo=False  # Set to True for SQL query logging
 )
 
+# Async engine for the async route handlers, on the same database through aiomysql
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    echo=False
+)
+
+# Per-request SQL statement counter (see count_db_queries middleware in main.py)
+# Holds a mutable dict so statements run in threadpool workers are counted too
+_query_counter: ContextVar = ContextVar("query_counter", default=None)
+
+
+@event.listens_for(engine, "before_cursor_execute")
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter["count"] += 1
+
+
+def start_query_count():
+    """
+    Start counting SQL statements for the current request
+    
+    Returns (counter, token); counter["count"] holds the running total and
+    token must be passed to stop_query_count when the request finishes
+    """
+    counter = {"count": 0}
+    token = _query_counter.set(counter)
+    return counter, token
+
+
+def stop_query_count(token):
+    """
+    Stop counting SQL statements for the current request
+    """
+    _query_counter.reset(token)
+
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay loaded after commit: lazy loads are not possible on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
@@ -38,3 +86,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Async database dependency for FastAPI (for async def route handlers)
+    
+    Synchronous helpers that take a Session can be run on it with
+    `await db.run_sync(helper, *args)`.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
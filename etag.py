@@ -0,0 +1,49 @@
+import hashlib
+import json
+
+from fastapi import Request, Response, status
+
+# Clients may keep responses but must revalidate them with If-None-Match
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(*parts) -> str:
+    """
+    Strong ETag for a response, derived from row versions rather than the body
+
+    Args:
+        parts: JSON-serializable values that change whenever the response would
+            (ids, version sums, counts); dates and decimals are stringified
+    """
+    raw = json.dumps(parts, default=str, separators=(",", ":"))
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    True if the request's If-None-Match header lists etag (or is *)
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = ETAG_CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Empty 304 response carrying the current ETag
+    """
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
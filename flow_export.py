@@ -0,0 +1,203 @@
+import csv
+import io
+from datetime import date, datetime
+from typing import Iterable, List, Optional
+
+from payload_fields import DECIMAL_PRECISION, DECIMAL_SCALE, coerce_value
+
+# Optional pyarrow imports - handle gracefully if not installed
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    print("Warning: pyarrow not installed. Parquet exports will be disabled.")
+
+# Base entry columns written before the form-specific payload columns
+BASE_COLUMNS = [
+    ("id", "INTEGER"),
+    ("company_id", "INTEGER"),
+    ("inflow_form_id", "INTEGER"),
+    ("source", "TEXT"),
+    ("mode", "TEXT"),
+    ("bank_name", "TEXT"),
+    ("bank_account_number", "TEXT"),
+    ("created_at", "TIMESTAMP"),
+]
+
+def build_export_columns(forms) -> List[tuple]:
+    """
+    Build the (column_name, column_type) list for a table export
+
+    Args:
+        forms: InflowForm objects (with fields loaded) included in the export
+
+    Returns:
+        BASE_COLUMNS followed by one column per distinct payload field_key, in
+        form and sort order. A field_key declared with different types on
+        different forms is exported as TEXT.
+    """
+    columns = list(BASE_COLUMNS)
+    reserved = {name for name, _ in BASE_COLUMNS}
+    field_types = {}
+    for form in forms:
+        for field in sorted(form.fields, key=lambda f: (f.sort_order, f.id)):
+            field_type = field.field_type.value if hasattr(field.field_type, "value") else field.field_type
+            if field_type not in ("NUMBER", "DATE"):
+                field_type = "TEXT"
+            if field.field_key in reserved:
+                continue
+            if field.field_key not in field_types:
+                field_types[field.field_key] = field_type
+                columns.append((field.field_key, field_type))
+            elif field_types[field.field_key] != field_type:
+                field_types[field.field_key] = "TEXT"
+    return [(name, field_types.get(name, column_type)) for name, column_type in columns]
+
+
+def flatten_entry(row, sources: dict) -> dict:
+    """
+    Flatten an entry row (id, company_id, inflow_form_id, mode, bank_name,
+    bank_account_number, payload, created_at) into an export record keyed by
+    column name. Payload values are left raw; coerce_value types them.
+    """
+    payload = row.payload or {}
+    record = dict(payload)
+    record.update({
+        "id": row.id,
+        "company_id": row.company_id,
+        "inflow_form_id": row.inflow_form_id,
+        "source": sources.get(row.inflow_form_id),
+        "mode": row.mode or payload.get("mode"),
+        "bank_name": row.bank_name or payload.get("bank_name"),
+        "bank_account_number": row.bank_account_number or payload.get("bank_account_number"),
+        "created_at": row.created_at,
+    })
+    return record
+
+
+def iter_csv(records: Iterable[dict], columns: List[tuple], rows_per_chunk: int = 1000):
+    """
+    Yield CSV text for records in chunks of rows_per_chunk rows
+
+    Values that do not match their column type are written as-is so no data is lost.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    pending = 0
+    for record in records:
+        out = []
+        for name, column_type in columns:
+            raw = record.get(name)
+            try:
+                value = coerce_value(column_type, raw)
+            except ValueError:
+                value = raw
+            if isinstance(value, datetime):
+                value = value.isoformat(sep=" ")
+            elif isinstance(value, date):
+                value = value.isoformat()
+            out.append("" if value is None else value)
+        writer.writerow(out)
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining
+
+
+class _ChunkSink:
+    """
+    Write-only file object that hands written bytes back to the caller in chunks
+
+    ParquetWriter relies on tell() for footer offsets, so the position keeps
+    counting even after drained bytes are released.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_type(column_type: str):
+    if column_type == "INTEGER":
+        return pa.int64()
+    if column_type == "NUMBER":
+        return pa.decimal128(DECIMAL_PRECISION, DECIMAL_SCALE)
+    if column_type == "DATE":
+        return pa.date32()
+    if column_type == "TIMESTAMP":
+        return pa.timestamp("s")
+    return pa.string()
+
+
+def iter_parquet(records: Iterable[dict], columns: List[tuple], rows_per_group: int = 10000):
+    """
+    Yield a Parquet file as bytes, one row group of rows_per_group records at a time
+
+    Only the current row group is held in memory. Values that do not match
+    their column type are written as null.
+    """
+    if not PYARROW_AVAILABLE:
+        raise Exception("pyarrow is not installed. Please install it using: pip install pyarrow")
+
+    schema = pa.schema([(name, _arrow_type(column_type)) for name, column_type in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    def _coerce_or_null(column_type, raw) -> Optional[object]:
+        try:
+            return coerce_value(column_type, raw)
+        except ValueError:
+            return None
+
+    batch = {name: [] for name, _ in columns}
+    pending = 0
+    try:
+        for record in records:
+            for name, column_type in columns:
+                batch[name].append(_coerce_or_null(column_type, record.get(name)))
+            pending += 1
+            if pending >= rows_per_group:
+                writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+                batch = {name: [] for name, _ in columns}
+                pending = 0
+                yield sink.drain()
+        if pending:
+            writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,133 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy.orm import Session, selectinload
+
+from cache import form_cache
+from models import InflowForm
+
+# Read-through access to inflow forms and their fields via the in-process
+# form_cache. Cached values are immutable snapshots, not ORM objects, so they
+# can be shared between requests and threads. Every form or field write must
+# call invalidate_forms() after it commits.
+
+
+def _val(e):
+    return e.value if hasattr(e, "value") else e
+
+
+@dataclass(frozen=True)
+class CachedFormField:
+    id: int
+    inflow_form_id: int
+    field_key: str
+    label: str
+    field_type: str
+    is_required: bool
+    options: Any
+    sort_order: int
+    created_at: Optional[datetime]
+    version: int
+
+
+@dataclass(frozen=True)
+class CachedForm:
+    id: int
+    flow_type: str
+    mode: str
+    source: str
+    attachment: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    version: int
+    fields: Tuple[CachedFormField, ...]  # in (sort_order, id) order
+
+
+def _snapshot(form: InflowForm) -> CachedForm:
+    fields = sorted(form.fields, key=lambda f: (f.sort_order or 0, f.id))
+    return CachedForm(
+        id=form.id,
+        flow_type=_val(form.flow_type),
+        mode=_val(form.mode),
+        source=form.source,
+        attachment=_val(form.attachment),
+        created_at=form.created_at,
+        updated_at=form.updated_at,
+        version=form.version,
+        fields=tuple(
+            CachedFormField(
+                id=f.id,
+                inflow_form_id=f.inflow_form_id,
+                field_key=f.field_key,
+                label=f.label,
+                field_type=_val(f.field_type),
+                is_required=bool(f.is_required),
+                options=f.options,
+                sort_order=f.sort_order or 0,
+                created_at=f.created_at,
+                version=f.version,
+            )
+            for f in fields
+        ),
+    )
+
+
+def get_form(db: Session, form_id: int) -> Optional[CachedForm]:
+    """
+    Form with its sorted fields, or None if it does not exist (misses are not cached)
+    """
+    key = ("form", form_id)
+    cached = form_cache.get(key)
+    if cached is not None:
+        return cached
+    generation = form_cache.generation
+    form = (
+        db.query(InflowForm)
+        .options(selectinload(InflowForm.fields))
+        .filter(InflowForm.id == form_id)
+        .first()
+    )
+    if form is None:
+        return None
+    snapshot = _snapshot(form)
+    form_cache.set(key, snapshot, generation)
+    return snapshot
+
+
+def get_form_fields(db: Session, form_id: int) -> Tuple[CachedFormField, ...]:
+    """
+    Sorted fields of a form, empty if the form does not exist
+    """
+    form = get_form(db, form_id)
+    return form.fields if form is not None else ()
+
+
+def list_forms(db: Session, flow_type: str, mode: Optional[str] = None) -> Tuple[CachedForm, ...]:
+    """
+    Forms of a flow_type (and mode, if given), most recently updated first
+    """
+    key = ("forms", flow_type, mode)
+    cached = form_cache.get(key)
+    if cached is not None:
+        return cached
+    generation = form_cache.generation
+    query = (
+        db.query(InflowForm)
+        .options(selectinload(InflowForm.fields))
+        .filter(InflowForm.flow_type == flow_type)
+    )
+    if mode is not None:
+        query = query.filter(InflowForm.mode == mode)
+    forms = tuple(_snapshot(form) for form in query.order_by(InflowForm.updated_at.desc()))
+    form_cache.set(key, forms, generation)
+    for form in forms:
+        form_cache.set(("form", form.id), form, generation)
+    return forms
+
+
+def invalidate_forms():
+    """
+    Drop every cached form and form list (forms change rarely, so no finer tracking)
+    """
+    form_cache.clear()
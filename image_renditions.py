@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from railway_storage import content_type_for
+
+try:
+    from PIL import Image, ImageOps
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+    print("Warning: Pillow not installed. Image previews and thumbnails will be disabled.")
+
+# Downscaled renditions of image attachments, stored next to the original by the
+# upload worker (attachment_queue.py): a preview bounded to IMAGE_PREVIEW_MAX_SIZE
+# pixels and a small thumbnail, both JPEG. Decoding and re-encoding is CPU bound,
+# so it runs in a process pool instead of the upload threads.
+
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", "2"))
+IMAGE_PREVIEW_MAX_SIZE = int(os.getenv("IMAGE_PREVIEW_MAX_SIZE", "1600"))
+IMAGE_PREVIEW_QUALITY = int(os.getenv("IMAGE_PREVIEW_QUALITY", "80"))
+IMAGE_THUMBNAIL_SIZE = int(os.getenv("IMAGE_THUMBNAIL_SIZE", "320"))
+IMAGE_THUMBNAIL_QUALITY = int(os.getenv("IMAGE_THUMBNAIL_QUALITY", "70"))
+# Larger images are not decoded (a 50 MP camera photo fits; decompression bombs do not)
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", "60000000"))
+if PILLOW_AVAILABLE:
+    # Pillow's own bomb check (it warns above this and refuses at twice it)
+    Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+
+_RENDERED_CONTENT_TYPES = ("image/jpeg", "image/png")
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def is_renderable_image(file_name: str) -> bool:
+    """
+    Whether renditions are made for a file (JPEG / PNG by content_type_for, and Pillow installed)
+    """
+    return PILLOW_AVAILABLE and content_type_for(file_name) in _RENDERED_CONTENT_TYPES
+
+
+def _save_jpeg(image, max_size: int, quality: int) -> str:
+    image = image.copy()
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    fd, path = tempfile.mkstemp(suffix=".jpg")
+    with os.fdopen(fd, "wb") as out:
+        image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+    return path
+
+
+def render_image(source_path: str) -> Tuple[Optional[str], str]:
+    """
+    Write the preview and thumbnail of an image to temporary files and return
+    their paths (runs in a pool process)
+
+    The preview is None when it would not be smaller than the original.
+
+    Raises:
+        ValueError if the image has more than IMAGE_MAX_PIXELS pixels
+    """
+    with Image.open(source_path) as image:
+        # Checked from the header, before any pixel data is decoded
+        width, height = image.size
+        if width * height > IMAGE_MAX_PIXELS:
+            raise ValueError(f"Image is too large to render ({width}x{height} pixels)")
+        # Let the JPEG decoder scale down while decoding (much faster for camera photos)
+        image.draft("RGB", (IMAGE_PREVIEW_MAX_SIZE, IMAGE_PREVIEW_MAX_SIZE))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            background = Image.new("RGB", image.size, "white")
+            rgba = image.convert("RGBA")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+        preview_path = _save_jpeg(image, IMAGE_PREVIEW_MAX_SIZE, IMAGE_PREVIEW_QUALITY)
+        thumbnail_path = _save_jpeg(image, IMAGE_THUMBNAIL_SIZE, IMAGE_THUMBNAIL_QUALITY)
+    if os.path.getsize(preview_path) >= os.path.getsize(source_path):
+        os.remove(preview_path)
+        preview_path = None
+    return preview_path, thumbnail_path
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn, not fork: the server process has threads (and open DB connections)
+            _process_pool = ProcessPoolExecutor(
+                max_workers=IMAGE_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def _reset_process_pool(broken_pool: ProcessPoolExecutor):
+    global _process_pool
+    with _process_pool_lock:
+        # Another thread may already have replaced it
+        if _process_pool is broken_pool:
+            _process_pool = None
+    broken_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_image_in_pool(source_path: str) -> Tuple[Optional[str], str]:
+    """
+    render_image on the process pool, waiting for the result
+
+    A pool whose worker died (e.g. killed for memory) cannot run anything
+    again, so it is replaced and the image tried once more on the new one.
+    """
+    for retry in (True, False):
+        pool = _get_process_pool()
+        try:
+            return pool.submit(render_image, source_path).result()
+        except BrokenProcessPool:
+            _reset_process_pool(pool)
+            if not retry:
+                raise
+            print("⚠ Image process pool broke, restarting it")
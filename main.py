@@ -1,16 +1,34 @@
 <<<<<<< HEAD
 from fastapi import FastAPI, Depends, HTTPException, status
 =======
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, Request
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, Request, Response, Query
 >>>>>>> development
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy import and_, or_, select, insert, update, delete, func, extract
 from typing import List, Optional, Union
-from datetime import date
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import base64
 import json
-
-from database import get_db, engine
+import os
+
+from database import get_db, get_async_db, engine, SessionLocal, start_query_count, stop_query_count
+from cache import entry_count_cache, form_cache
+from form_cache import get_form, get_form_fields, list_forms, invalidate_forms
+from flow_export import build_export_columns, flatten_entry, iter_csv, iter_parquet, PYARROW_AVAILABLE
+from payload_fields import build_search_text, extract_amount_and_txn_date
+from rollup import apply_entry_to_rollup, apply_entries_to_rollup, upsert_rollup_rows
+from bulk_import import (
+    BULK_IMPORT_CHUNK_SIZE, BULK_IMPORT_MAX_ROWS, BULK_MUTATION_CHUNK_SIZE,
+    parse_csv_rows, prepare_entry_rows, rollup_rows_for,
+)
+from migrate import check_schema_version
+from etag import compute_etag, etag_matches, not_modified, set_etag
 <<<<<<< HEAD
 from models import Base, CustomerReceipt
 from schemas import CustomerReceiptCreate, CustomerReceiptResponse
@@ -19,7 +37,7 @@ from models import (
     Base, CustomerReceipt, BankLoanReceipt, VendorPayment, EmployeePayment,
     InflowReceiptMaster, Company, CompanyBankAccount,
     InflowForm, InflowFormField,
-    InflowEntryPayload, InflowEntryAttachment,
+    InflowEntryPayload, InflowEntryAttachment, AttachmentStatusEnum, CashflowDailyRollup,
 )
 from schemas import (
     CustomerReceiptCreate, CustomerReceiptResponse, 
@@ -32,23 +50,44 @@ from schemas import (
     CompanyWithBankAccounts, CompanyCreateResponse,
     InflowFormCreateWithFields, InflowFormCreate, InflowFormUpdate, InflowFormResponse, InflowFormWithFieldsResponse, InflowFormSourceResponse,
     InflowFormFieldCreate, InflowFormFieldUpdate, InflowFormFieldResponse, CustomFieldResponse,
-    FileUploadResponse, PresignedUrlResponse,
+    FileUploadResponse, PresignedUrlResponse, AttachmentUploadRequest, AttachmentUploadTarget, AttachmentUploadConfirm,
     InflowEntryPayloadCreate, InflowEntryPayloadResponse, InflowEntryCreateResponse,
-    InflowEntryEdit, InflowEntryDelete,
+    InflowEntryEdit, InflowEntryDelete, InflowEntryBulkSelect, InflowEntryBulkDelete, InflowEntryBulkEdit,
 )
 from firebase_storage import upload_file_to_firebase
-from railway_storage import upload_file_to_railway, regenerate_presigned_url, generate_presigned_url_from_path
+from railway_storage import (
+    upload_file_to_railway, regenerate_presigned_url, generate_presigned_url_from_path, storage_key_from_url,
+    generate_presigned_upload, confirm_uploaded_file, confirm_uploaded_files,
+    signed_url_cache, signed_url_for_key, signed_url_epoch,
+)
+from attachment_blobs import entry_storage_folders, release_attachment_blobs
+from attachment_queue import enqueue_attachments, requeue_pending_attachments, spool_upload
+from refresh_attachment_urls import refresh_progress, start_refresh
 >>>>>>> development
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 app = FastAPI(
     title="Customer Receipts API",
     description="API for managing customer receipts",
     version="1.0.0"
 )
 
+
+@app.on_event("startup")
+def verify_schema_version():
+    """
+    Tables are created and altered by `python migrate.py` (run once per release);
+    workers only check that the database is at the expected version
+    """
+    check_schema_version()
+
+
+@app.on_event("startup")
+def resume_attachment_uploads():
+    """
+    Re-enqueue attachment uploads left PENDING by the previous process
+    """
+    requeue_pending_attachments()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -59,6 +98,21 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def count_db_queries(request: Request, call_next):
+    """
+    Count SQL statements issued while handling a request and report them in
+    the X-DB-Query-Count response header
+    """
+    counter, token = start_query_count()
+    try:
+        response = await call_next(request)
+    finally:
+        stop_query_count(token)
+    response.headers["X-DB-Query-Count"] = str(counter["count"])
+    return response
+
+
 @app.get("/")
 def read_root():
     return {"message": "Customer Receipts API is running"}
@@ -575,11 +629,25 @@ def create_company(company: CompanyCreate, db: Session = Depends(get_db)):
 
 
 @app.get("/api/companies")
-def list_companies(db: Session = Depends(get_db)):
+def list_companies(request: Request, response: Response, db: Session = Depends(get_db)):
     """
     List all companies with their bank accounts in the specified format
+    
+    Sends an ETag built from row counts, max ids and version sums; a matching
+    If-None-Match gets an empty 304 before the company list is loaded.
     """
     try:
+        company_versions = db.execute(
+            select(func.count(Company.id), func.max(Company.id), func.sum(Company.version))
+        ).one()
+        bank_account_versions = db.execute(
+            select(func.count(CompanyBankAccount.id), func.max(CompanyBankAccount.id), func.sum(CompanyBankAccount.version))
+        ).one()
+        etag = compute_etag("companies", *company_versions, *bank_account_versions)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+        
         companies = db.query(Company).order_by(Company.created_at.desc()).all()
         
         result = []
@@ -833,6 +901,7 @@ def create_inflow_form_with_fields(payload: InflowFormCreateWithFields, db: Sess
             created_fields.append(db_field)
 
         db.commit()
+        invalidate_forms()
         db.refresh(db_form)
         for field in created_fields:
             db.refresh(field)
@@ -881,17 +950,10 @@ def list_inflow_forms(
     """
     Get inflow forms filtered by flow_type and mode.
     Equivalent to: SELECT * FROM inflow_forms WHERE flow_type = ? AND mode = ?
+    Served from the in-process form cache.
     """
     try:
-        query = (
-            db.query(InflowForm)
-            .filter(InflowForm.flow_type == flow_type, InflowForm.mode == mode)
-            .order_by(InflowForm.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-        forms = query.all()
-        return forms
+        return list(list_forms(db, flow_type, mode)[skip:skip + limit])
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -910,22 +972,11 @@ def list_inflow_form_sources(
     """
     Get id and source from inflow_forms filtered by flow_type and optionally by mode.
     Equivalent to: SELECT id, source FROM inflow_forms WHERE flow_type = ? [AND mode = ?]
+    Served from the in-process form cache.
     """
     try:
-        query = (
-            db.query(InflowForm.id, InflowForm.source)
-            .filter(InflowForm.flow_type == flow_type)
-        )
-        if mode is not None:
-            query = query.filter(InflowForm.mode == mode)
-        rows = (
-            query
-            .order_by(InflowForm.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-        return [InflowFormSourceResponse(id=r[0], source=r[1]) for r in rows]
+        forms = list_forms(db, flow_type, mode)[skip:skip + limit]
+        return [InflowFormSourceResponse(id=form.id, source=form.source) for form in forms]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -934,17 +985,33 @@ def list_inflow_form_sources(
 
 
 @app.get("/api/flow-forms/{form_id}", response_model=InflowFormWithFieldsResponse)
-def get_inflow_form(form_id: int, db: Session = Depends(get_db)):
-    """Get an inflow form by ID with its custom fields."""
-    form = db.query(InflowForm).filter(InflowForm.id == form_id).first()
+def get_inflow_form(form_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    Get an inflow form by ID with its custom fields.
+    
+    Served from the in-process form cache. Sends an ETag built from the form and
+    field versions; a matching If-None-Match gets an empty 304.
+    """
+    form = get_form(db, form_id)
     if not form:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Inflow form with id {form_id} not found"
         )
+    fields = form.fields
+    etag = compute_etag(
+        "flow-form",
+        form_id,
+        form.version,
+        len(fields),
+        max((f.id for f in fields), default=None),
+        sum(f.version for f in fields) if fields else None,
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     
     _val = lambda e: e.value if hasattr(e, "value") else e
-    fields = sorted(form.fields, key=lambda x: (x.sort_order, x.id))
     custom_fields_response = [
         CustomFieldResponse(
             field_key=f.field_key,
@@ -982,6 +1049,7 @@ def update_inflow_form(form_id: int, payload: InflowFormUpdate, db: Session = De
         for k, v in data.items():
             setattr(form, k, v)
         db.commit()
+        invalidate_forms()
         db.refresh(form)
         return form
     except Exception as e:
@@ -1002,8 +1070,15 @@ def delete_inflow_form(form_id: int, db: Session = Depends(get_db)):
             detail=f"Inflow form with id {form_id} not found"
         )
     try:
+        release_attachment_blobs(
+            db,
+            InflowEntryAttachment.inflow_entry_id.in_(
+                select(InflowEntryPayload.id).where(InflowEntryPayload.inflow_form_id == form_id)
+            )
+        )
         db.delete(form)
         db.commit()
+        invalidate_forms()
         return {"success": True, "message": f"Inflow form {form_id} deleted successfully"}
     except Exception as e:
         db.rollback()
@@ -1028,6 +1103,7 @@ def create_inflow_form_field(payload: InflowFormFieldCreate, db: Session = Depen
         db_field = InflowFormField(**payload.model_dump())
         db.add(db_field)
         db.commit()
+        invalidate_forms()
         db.refresh(db_field)
         return db_field
     except Exception as e:
@@ -1085,6 +1161,7 @@ def update_inflow_form_field(field_id: int, payload: InflowFormFieldUpdate, db:
         for k, v in data.items():
             setattr(field, k, v)
         db.commit()
+        invalidate_forms()
         db.refresh(field)
         return field
     except Exception as e:
@@ -1107,6 +1184,7 @@ def delete_inflow_form_field(field_id: int, db: Session = Depends(get_db)):
     try:
         db.delete(field)
         db.commit()
+        invalidate_forms()
         return {"success": True, "message": f"Inflow form field {field_id} deleted successfully"}
     except Exception as e:
         db.rollback()
@@ -1176,12 +1254,111 @@ def delete_inflow_form_field(field_id: int, db: Session = Depends(get_db)):
 #         )
 
 
+# Direct-to-storage Attachment Uploads
+
+@app.post("/api/attachments/presign", response_model=AttachmentUploadTarget, status_code=status.HTTP_200_OK)
+def presign_attachment_upload(body: AttachmentUploadRequest, db: Session = Depends(get_db)):
+    """
+    Issue a presigned target for uploading one attachment straight to storage
+    
+    - **company_id** / **inflow_form_id**: Entry the file is for; the key is created under
+      inflow/{company_id}/{inflow_form_id}/
+    - **file_name**: Original file name (its extension is kept)
+    - **content_type**: Content type the client will send (optional, defaults from the extension)
+    - **method**: PUT (send the bytes to url with the returned headers) or POST (multipart
+      form to url with the returned fields first, then the file)
+    
+    After uploading, pass the key in add-transaction's payload.file_upload (or
+    edit-transaction's file_upload), or check it with /api/attachments/confirm.
+    """
+    try:
+        if not db.query(Company.id).filter(Company.id == body.company_id).first():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Company with id {body.company_id} not found"
+            )
+        if get_form(db, body.inflow_form_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Inflow form with id {body.inflow_form_id} not found"
+            )
+        return generate_presigned_upload(
+            body.file_name,
+            folder=f"inflow/{body.company_id}/{body.inflow_form_id}",
+            method=body.method,
+            content_type=body.content_type,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error issuing upload URL: {str(e)}"
+        )
+
+
+@app.post("/api/attachments/confirm", status_code=status.HTTP_200_OK)
+def confirm_attachment_upload(body: AttachmentUploadConfirm):
+    """
+    Check that a presigned upload landed in storage
+    
+    - **company_id** / **inflow_form_id**: As passed to /api/attachments/presign
+    - **key**: Object key returned by /api/attachments/presign
+    
+    Returns { "success": true, "key": "...", "file_url": "..." } with a presigned GET URL,
+    or 400 if the key is outside the entry's folder or the object is missing or empty.
+    """
+    try:
+        confirm_uploaded_file(body.key, f"inflow/{body.company_id}/{body.inflow_form_id}")
+        return {"success": True, "key": body.key, "file_url": signed_url_for_key(body.key)}
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error confirming upload: {str(e)}"
+        )
+
+
 # Inflow Entry Transaction Endpoint
 
+def attachment_file_url(attachment: InflowEntryAttachment) -> Optional[str]:
+    """
+    URL to return for an attachment: signed from its storage key (cached, see
+    signed_url_for_key), or the stored file_url for rows without a key
+    """
+    if attachment.storage_key:
+        return signed_url_for_key(attachment.storage_key) or attachment.file_url
+    return attachment.file_url
+
+
+def rendition_url(key: Optional[str]) -> Optional[str]:
+    """
+    Signed URL of an image preview / thumbnail key, None for attachments without one
+    """
+    return signed_url_for_key(key) if key else None
+
+
+def uploaded_file_size(file) -> int:
+    """
+    Size in bytes of a multipart upload, without reading it into memory
+    """
+    if getattr(file, "size", None) is not None:
+        return file.size
+    position = file.file.tell()
+    file.file.seek(0, 2)
+    size = file.file.tell()
+    file.file.seek(position)
+    return size
+
+
 @app.post("/api/add-transaction", response_model=InflowEntryCreateResponse, status_code=status.HTTP_201_CREATED)
 async def add_transaction(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new inflow entry transaction with optional file attachments from device
@@ -1193,6 +1370,8 @@ async def add_transaction(
     - **bank_name**: Bank name (optional, form field – outside payload)
     - **bank_account_number**: Bank account number (optional, form field – outside payload)
     - **files**: Optional list of files to upload as attachments (can upload multiple files from device)
+    - **payload.file_upload**: Optional list of attachment URLs, or of object keys uploaded directly
+      to storage via /api/attachments/presign (keys are checked to exist before they are attached)
     
     Returns the created entry with all attachments
     
@@ -1292,7 +1471,7 @@ async def add_transaction(
             print(f"🔍 DEBUG: Try checking request directly or use different parsing method.")
         
         # Validate company exists
-        company = db.query(Company).filter(Company.id == company_id).first()
+        company = await db.get(Company, company_id)
         if not company:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1300,7 +1479,7 @@ async def add_transaction(
             )
         
         # Validate inflow form exists
-        inflow_form = db.query(InflowForm).filter(InflowForm.id == inflow_form_id).first()
+        inflow_form = await db.run_sync(get_form, inflow_form_id)
         if not inflow_form:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1360,6 +1539,7 @@ async def add_transaction(
             payload_dict["bank_account_number"] = str(bank_account_number).strip()
         
         # Create inflow entry payload
+        amount, txn_date = extract_amount_and_txn_date(payload_dict, inflow_form.fields)
         db_entry = InflowEntryPayload(
             company_id=company_id,
             inflow_form_id=inflow_form_id,
@@ -1367,9 +1547,13 @@ async def add_transaction(
             mode=payload_dict.get("mode"),
             bank_name=payload_dict.get("bank_name"),
             bank_account_number=payload_dict.get("bank_account_number"),
+            amount=amount,
+            txn_date=txn_date,
+            search_text=build_search_text(payload_dict, inflow_form.fields),
         )
         db.add(db_entry)
-        db.flush()  # Flush to get the entry ID without committing
+        await db.flush()  # Flush to get the entry ID without committing
+        await db.run_sync(apply_entry_to_rollup, db_entry.id, 1)
         
         # Handle file uploads from device if provided
         # Support both single file and multiple files
@@ -1390,7 +1574,10 @@ async def add_transaction(
         
         # files_list is already parsed from form_data above
         
-        # Handle files uploaded from device - UPLOAD TO RAILWAY STORAGE
+        # Handle files uploaded from device - spooled to local disk and uploaded to
+        # Railway Storage by the background workers (attachment_queue.py) after commit,
+        # so the request does not wait on storage
+        queued_attachments = []
         print(f"🔍 DEBUG: files_list length: {len(files_list) if files_list else 0}")
         if files_list and len(files_list) > 0:
             print(f"✓ Processing {len(files_list)} file(s) from device for Railway Storage upload...")
@@ -1401,45 +1588,44 @@ async def add_transaction(
                 # Check if file has a filename (file was actually uploaded from device)
                 if hasattr(file, 'filename') and file.filename and file.filename.strip():
                     try:
-                        # Read file content from device
-                        file_content = await file.read()
-                        file_size = len(file_content)
-                        
-                        if file_content and file_size > 0:
-                            print(f"Uploading file from device to Railway Storage: {file.filename} ({file_size} bytes)")
-                            
-                            # Upload to Railway Storage - DEVICE FILE TO RAILWAY
-                            file_url = upload_file_to_railway(
-                                file_content=file_content,
+                        file_size = uploaded_file_size(file)
+                        if file_size > 0:
+                            print(f"Queueing file from device for Railway Storage: {file.filename} ({file_size} bytes)")
+                            spool_path, content_sha256 = await run_in_threadpool(spool_upload, file.file, file.filename)
+                            db_attachment = InflowEntryAttachment(
+                                inflow_entry_id=db_entry.id,
+                                status=AttachmentStatusEnum.PENDING,
                                 file_name=file.filename,
-                                folder=f"inflow/{company_id}/{inflow_form_id}"  # Organized folder structure
+                                spool_path=spool_path,
+                                content_sha256=content_sha256
                             )
-                            
-                            if file_url:
-                                print(f"✓ Successfully uploaded {file.filename} to Railway Storage: {file_url}")
-                                
-                                # Create attachment record with Railway Storage URL
-                                db_attachment = InflowEntryAttachment(
-                                    inflow_entry_id=db_entry.id,
-                                    file_url=file_url  # Railway Storage URL stored here
-                                )
-                                db.add(db_attachment)
-                                attachment_urls.append(file_url)
-                                uploaded_files_count += 1
-                            else:
-                                failed_files.append(file.filename)
-                                print(f"✗ Failed to upload file {file.filename} to Railway Storage - no URL returned")
+                            db.add(db_attachment)
+                            queued_attachments.append(db_attachment)
                         else:
                             failed_files.append(file.filename)
                             print(f"✗ File {file.filename} is empty (0 bytes)")
-                    except Exception as upload_error:
+                    except Exception as read_error:
                         failed_files.append(file.filename)
-                        error_msg = str(upload_error)
-                        print(f"✗ Error uploading file {file.filename} to Railway Storage: {error_msg}")
-                        # Continue with other files even if one fails
+                        print(f"✗ Error spooling file {file.filename}: {str(read_error)}")
                 else:
                     print(f"Warning: Skipping file with no filename")
         
+        # Object keys from presigned direct uploads (/api/attachments/presign) are
+        # checked in storage before they are attached
+        uploaded_keys = [value for value in file_urls_from_payload if not value.startswith(("http://", "https://"))]
+        if uploaded_keys:
+            file_urls_from_payload = [value for value in file_urls_from_payload if value not in uploaded_keys]
+            confirm_errors = await confirm_uploaded_files(uploaded_keys, f"inflow/{company_id}/{inflow_form_id}")
+            for key, confirm_error in zip(uploaded_keys, confirm_errors):
+                if confirm_error is None:
+                    db.add(InflowEntryAttachment(inflow_entry_id=db_entry.id, storage_key=key))
+                    attachment_urls.append(key)
+                    uploaded_files_count += 1
+                    print(f"✓ Confirmed directly uploaded file: {key}")
+                else:
+                    failed_files.append(key)
+                    print(f"✗ Could not confirm uploaded file {key}: {confirm_error}")
+        
         # Handle file URLs from payload (already uploaded files - these are already Railway Storage URLs)
         if file_urls_from_payload:
             print(f"Processing {len(file_urls_from_payload)} file URL(s) from payload (already in Railway Storage)...")
@@ -1448,7 +1634,9 @@ async def add_transaction(
                     # Create attachment record for already uploaded Railway Storage URL
                     db_attachment = InflowEntryAttachment(
                         inflow_entry_id=db_entry.id,
-                        file_url=file_url  # Railway Storage URL from payload
+                        file_url=file_url,  # Railway Storage URL from payload
+                        # Key to sign fresh URLs from (None for URLs outside this entry's folders)
+                        storage_key=storage_key_from_url(file_url, *entry_storage_folders(company_id, inflow_form_id))
                     )
                     db.add(db_attachment)
                     attachment_urls.append(file_url)
@@ -1459,13 +1647,15 @@ async def add_transaction(
                     print(f"✗ Error creating attachment for Railway Storage URL {file_url}: {str(url_error)}")
         
         # Commit all changes
-        db.commit()
-        db.refresh(db_entry)
+        await db.commit()
+        await db.refresh(db_entry)
+        entry_count_cache.increment(db_entry.company_id, db_entry.inflow_form_id, db_entry.mode)
+        enqueue_attachments(att.id for att in queued_attachments)
         
         # Get all attachments for this entry
-        attachments = db.query(InflowEntryAttachment).filter(
-            InflowEntryAttachment.inflow_entry_id == db_entry.id
-        ).all()
+        attachments = (await db.execute(
+            select(InflowEntryAttachment).where(InflowEntryAttachment.inflow_entry_id == db_entry.id)
+        )).scalars().all()
         
         print(f"🔍 DEBUG: Total attachments in database: {len(attachments)}")
         print(f"🔍 DEBUG: uploaded_files_count: {uploaded_files_count}")
@@ -1476,9 +1666,11 @@ async def add_transaction(
         message = f"Inflow entry created successfully"
         if uploaded_files_count > 0:
             message += f" with {uploaded_files_count} file(s) uploaded to Railway Storage"
+        if queued_attachments:
+            message += f"{',' if uploaded_files_count else ' with'} {len(queued_attachments)} file(s) queued for upload"
         if failed_files:
             message += f". {len(failed_files)} file(s) failed to upload: {', '.join(failed_files[:5])}"  # Limit to first 5
-        if len(files_list) > 0 and uploaded_files_count == 0:
+        if len(files_list) > 0 and uploaded_files_count == 0 and not queued_attachments:
             message += f". Warning: {len(files_list)} file(s) were received but none were uploaded successfully."
         
         # Build attachments list for response
@@ -1487,7 +1679,11 @@ async def add_transaction(
             attachments_list.append({
                 "id": att.id,
                 "inflow_entry_id": att.inflow_entry_id,
-                "file_url": att.file_url,
+                "file_url": attachment_file_url(att),
+                "preview_url": rendition_url(att.preview_key),
+                "thumbnail_url": rendition_url(att.thumbnail_key),
+                "status": att.status,
+                "last_error": att.last_error,
                 "created_at": att.created_at
             })
         
@@ -1507,10 +1703,10 @@ async def add_transaction(
             }
         }
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating inflow entry: {str(e)}"
@@ -1518,7 +1714,7 @@ async def add_transaction(
 
 
 @app.put("/api/edit-transaction", response_model=InflowEntryCreateResponse, status_code=status.HTTP_200_OK)
-async def edit_transaction(request: Request, db: Session = Depends(get_db)):
+async def edit_transaction(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Update an existing inflow entry (transaction) by id (PUT method).
 
@@ -1526,6 +1722,7 @@ async def edit_transaction(request: Request, db: Session = Depends(get_db)):
     - **JSON body** (Content-Type: application/json): id, payload, mode, bank_name, bank_account_number.
     - **Form-data** (Content-Type: multipart/form-data): id (required), payload (optional JSON string),
       mode, bank_name, bank_account_number, and optional **files** to upload as new attachments.
+      **file_upload** (JSON list) adds attachments by URL or by directly uploaded object key.
 
     Form-data example with file upload:
     curl -X PUT "http://localhost:8000/api/edit-transaction" \\
@@ -1549,14 +1746,18 @@ async def edit_transaction(request: Request, db: Session = Depends(get_db)):
                     detail="id is required and must be a valid integer"
                 )
 
-            entry = db.query(InflowEntryPayload).filter(InflowEntryPayload.id == entry_id).first()
+            entry = (await db.execute(
+                select(InflowEntryPayload).where(InflowEntryPayload.id == entry_id)
+            )).scalar_one_or_none()
             if not entry:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Inflow entry with id {entry_id} not found"
                 )
+            await db.run_sync(apply_entry_to_rollup, entry.id, -1)
 
-            current = entry.payload or {}
+            # Copy so the reassignment below is seen as a change to the JSON column
+            current = dict(entry.payload or {})
             payload_raw = form_data.get("payload")
             if payload_raw is not None and str(payload_raw).strip():
                 try:
@@ -1575,24 +1776,29 @@ async def edit_transaction(request: Request, db: Session = Depends(get_db)):
             if bank_account_number is not None and str(bank_account_number).strip():
                 current["bank_account_number"] = str(bank_account_number).strip()
 
+            previous_mode = entry.mode
             entry.payload = current
             entry.mode = current.get("mode")
             entry.bank_name = current.get("bank_name")
             entry.bank_account_number = current.get("bank_account_number")
-            db.flush()
+            form_fields = await db.run_sync(get_form_fields, entry.inflow_form_id)
+            entry.amount, entry.txn_date = extract_amount_and_txn_date(current, form_fields)
+            entry.search_text = build_search_text(current, form_fields)
+            await db.flush()
+            await db.run_sync(apply_entry_to_rollup, entry.id, 1)
 
             # Parse files from form (same as add-transaction)
             files_list = []
             if "files" in form_data:
                 for file_item in form_data.getlist("files"):
-                    if isinstance(file_item, UploadFile):
+                    if hasattr(file_item, "read"):
                         fn = getattr(file_item, "filename", None) or getattr(file_item, "name", None)
                         if fn and str(fn).strip() and fn != "undefined":
                             files_list.append(file_item)
             for key in form_data.keys():
                 if "file" in key.lower():
                     value = form_data.get(key)
-                    if isinstance(value, UploadFile) and value not in files_list and getattr(value, "filename", None):
+                    if hasattr(value, "read") and value not in files_list and getattr(value, "filename", None):
                         files_list.append(value)
 
             file_urls_from_form = []
@@ -1611,49 +1817,78 @@ async def edit_transaction(request: Request, db: Session = Depends(get_db)):
             uploaded_count = 0
             failed_files = []
 
+            # Device files are spooled and uploaded in the background after commit (as add-transaction)
+            queued_attachments = []
             for file in files_list:
                 if hasattr(file, "filename") and file.filename and file.filename.strip():
                     try:
-                        file_content = await file.read()
-                        if file_content:
-                            file_url = upload_file_to_railway(
-                                file_content=file_content,
+                        if uploaded_file_size(file) > 0:
+                            spool_path, content_sha256 = await run_in_threadpool(spool_upload, file.file, file.filename)
+                            attachment = InflowEntryAttachment(
+                                inflow_entry_id=entry.id,
+                                status=AttachmentStatusEnum.PENDING,
                                 file_name=file.filename,
-                                folder=folder,
+                                spool_path=spool_path,
+                                content_sha256=content_sha256,
                             )
-                            if file_url:
-                                db.add(InflowEntryAttachment(inflow_entry_id=entry.id, file_url=file_url))
-                                uploaded_count += 1
-                            else:
-                                failed_files.append(file.filename)
+                            db.add(attachment)
+                            queued_attachments.append(attachment)
                     except Exception:
                         failed_files.append(getattr(file, "filename", "?"))
 
+            uploaded_keys = [value for value in file_urls_from_form if not value.startswith(("http://", "https://"))]
+            if uploaded_keys:
+                file_urls_from_form = [value for value in file_urls_from_form if value not in uploaded_keys]
+                confirm_errors = await confirm_uploaded_files(uploaded_keys, folder)
+                for key, confirm_error in zip(uploaded_keys, confirm_errors):
+                    if confirm_error is None:
+                        db.add(InflowEntryAttachment(inflow_entry_id=entry.id, storage_key=key))
+                        uploaded_count += 1
+                    else:
+                        failed_files.append(key)
+
             for file_url in file_urls_from_form:
                 try:
-                    db.add(InflowEntryAttachment(inflow_entry_id=entry.id, file_url=file_url))
+                    db.add(InflowEntryAttachment(
+                        inflow_entry_id=entry.id,
+                        file_url=file_url,
+                        storage_key=storage_key_from_url(file_url, *entry_storage_folders(entry.company_id, entry.inflow_form_id)),
+                    ))
                     uploaded_count += 1
                 except Exception:
                     failed_files.append(file_url)
 
-            db.commit()
-            db.refresh(entry)
+            if uploaded_count > 0 or queued_attachments:
+                # New attachments change the entry as listed, so bump its version (ETags)
+                entry.version = InflowEntryPayload.version + 1
+            await db.commit()
+            await db.refresh(entry)
+            enqueue_attachments(att.id for att in queued_attachments)
+            if entry.mode != previous_mode:
+                entry_count_cache.invalidate(entry.company_id, entry.inflow_form_id, previous_mode)
+                entry_count_cache.invalidate(entry.company_id, entry.inflow_form_id, entry.mode)
             message = "Transaction updated successfully"
             if uploaded_count > 0:
                 message += f" with {uploaded_count} file(s) uploaded"
+            if queued_attachments:
+                message += f"{',' if uploaded_count else ' with'} {len(queued_attachments)} file(s) queued for upload"
             if failed_files:
                 message += f". {len(failed_files)} file(s) failed: {', '.join(failed_files[:5])}"
         else:
             # JSON body
             body = await request.json()
             body = InflowEntryEdit(**body)
-            entry = db.query(InflowEntryPayload).filter(InflowEntryPayload.id == body.id).first()
+            entry = (await db.execute(
+                select(InflowEntryPayload).where(InflowEntryPayload.id == body.id)
+            )).scalar_one_or_none()
             if not entry:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Inflow entry with id {body.id} not found"
                 )
-            current = entry.payload or {}
+            await db.run_sync(apply_entry_to_rollup, entry.id, -1)
+            # Copy so the reassignment below is seen as a change to the JSON column
+            current = dict(entry.payload or {})
             if body.payload is not None:
                 current = {**current, **body.payload}
             if body.mode is not None:
@@ -1662,19 +1897,36 @@ async def edit_transaction(request: Request, db: Session = Depends(get_db)):
                 current["bank_name"] = body.bank_name
             if body.bank_account_number is not None:
                 current["bank_account_number"] = body.bank_account_number
+            previous_mode = entry.mode
             entry.payload = current
             entry.mode = body.mode if body.mode is not None else current.get("mode")
             entry.bank_name = body.bank_name if body.bank_name is not None else current.get("bank_name")
             entry.bank_account_number = body.bank_account_number if body.bank_account_number is not None else current.get("bank_account_number")
-            db.commit()
-            db.refresh(entry)
+            form_fields = await db.run_sync(get_form_fields, entry.inflow_form_id)
+            entry.amount, entry.txn_date = extract_amount_and_txn_date(current, form_fields)
+            entry.search_text = build_search_text(current, form_fields)
+            await db.run_sync(apply_entry_to_rollup, entry.id, 1)
+            await db.commit()
+            await db.refresh(entry)
+            if entry.mode != previous_mode:
+                entry_count_cache.invalidate(entry.company_id, entry.inflow_form_id, previous_mode)
+                entry_count_cache.invalidate(entry.company_id, entry.inflow_form_id, entry.mode)
             message = "Transaction updated successfully"
 
-        attachments = db.query(InflowEntryAttachment).filter(
-            InflowEntryAttachment.inflow_entry_id == entry.id
-        ).all()
+        attachments = (await db.execute(
+            select(InflowEntryAttachment).where(InflowEntryAttachment.inflow_entry_id == entry.id)
+        )).scalars().all()
         attachments_list = [
-            {"id": att.id, "inflow_entry_id": att.inflow_entry_id, "file_url": att.file_url, "created_at": att.created_at}
+            {
+                "id": att.id,
+                "inflow_entry_id": att.inflow_entry_id,
+                "file_url": attachment_file_url(att),
+                "preview_url": rendition_url(att.preview_key),
+                "thumbnail_url": rendition_url(att.thumbnail_key),
+                "status": att.status,
+                "last_error": att.last_error,
+                "created_at": att.created_at,
+            }
             for att in attachments
         ]
         return {
@@ -1690,16 +1942,65 @@ async def edit_transaction(request: Request, db: Session = Depends(get_db)):
             }
         }
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating inflow entry: {str(e)}"
         )
 
 
+@app.post("/api/attachments/{attachment_id}/retry", status_code=status.HTTP_200_OK)
+def retry_attachment_upload(attachment_id: int, db: Session = Depends(get_db)):
+    """
+    Queue a FAILED attachment upload again from its spooled file
+    
+    - **attachment_id**: ID of the attachment (status FAILED in the entry listing)
+    
+    Returns 409 if the attachment is not FAILED, or if its spooled file is gone
+    (the file must then be uploaded again with edit-transaction).
+    """
+    try:
+        attachment = db.get(InflowEntryAttachment, attachment_id)
+        if not attachment:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Attachment with id {attachment_id} not found"
+            )
+        if attachment.status != AttachmentStatusEnum.FAILED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Attachment is {attachment.status.value}, only FAILED uploads can be retried"
+            )
+        if not attachment.spool_path or not os.path.exists(attachment.spool_path):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Spooled file is missing; upload the file again"
+            )
+        attachment.status = AttachmentStatusEnum.PENDING
+        attachment.attempts = 0
+        attachment.last_error = None
+        attachment.claimed_at = None
+        db.execute(
+            update(InflowEntryPayload)
+            .where(InflowEntryPayload.id == attachment.inflow_entry_id)
+            .values(version=InflowEntryPayload.version + 1)
+        )
+        db.commit()
+        enqueue_attachments([attachment.id])
+        return {"success": True, "message": "Attachment upload queued", "id": attachment.id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrying attachment upload: {str(e)}"
+        )
+
+
 @app.delete("/api/delete-transaction", status_code=status.HTTP_200_OK)
 def delete_transaction(body: InflowEntryDelete, db: Session = Depends(get_db)):
     """
@@ -1713,8 +2014,12 @@ def delete_transaction(body: InflowEntryDelete, db: Session = Depends(get_db)):
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Inflow entry with id {body.id} not found"
             )
+        entry_key = (entry.company_id, entry.inflow_form_id, entry.mode)
+        apply_entry_to_rollup(db, entry.id, -1)
+        release_attachment_blobs(db, InflowEntryAttachment.inflow_entry_id == entry.id)
         db.delete(entry)
         db.commit()
+        entry_count_cache.decrement(*entry_key)
         return {"success": True, "message": f"Transaction {body.id} deleted successfully"}
     except HTTPException:
         db.rollback()
@@ -1727,6 +2032,313 @@ def delete_transaction(body: InflowEntryDelete, db: Session = Depends(get_db)):
         )
 
 
+@app.post("/api/add-transactions/bulk", status_code=status.HTTP_200_OK)
+async def add_transactions_bulk(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Import many inflow entries for one company and form in a single request.
+    
+    Accepts either:
+    - **JSON body** (Content-Type: application/json): an array of payload objects, with
+      company_id and inflow_form_id as query parameters.
+    - **Form-data** (Content-Type: multipart/form-data): company_id, inflow_form_id and a CSV
+      **file** whose header row names the payload keys (mode, bank_name and
+      bank_account_number columns fill those fields as in add-transaction).
+    
+    Each row is validated against the form (required fields, NUMBER / DATE values).
+    Valid rows are inserted in chunks of BULK_IMPORT_CHUNK_SIZE, one executemany and
+    one transaction per chunk; invalid rows are skipped and reported by 1-based row number.
+    Attachments are not supported here.
+    
+    Example usage with curl:
+    curl -X POST "http://localhost:8000/api/add-transactions/bulk" \\
+      -F "company_id=1" \\
+      -F "inflow_form_id=1" \\
+      -F "file=@/path/to/transactions.csv"
+    """
+    try:
+        content_type = request.headers.get("content-type", "")
+        params = request.query_params
+        
+        if "multipart/form-data" in content_type:
+            form_data = await request.form()
+            company_id_raw = form_data.get("company_id") or params.get("company_id")
+            inflow_form_id_raw = form_data.get("inflow_form_id") or params.get("inflow_form_id")
+            upload = form_data.get("file")
+            if upload is None or not hasattr(upload, "read"):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="file is required and must be a CSV upload"
+                )
+            try:
+                payloads = parse_csv_rows(await upload.read())
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid CSV file: {str(e)}"
+                )
+        else:
+            company_id_raw = params.get("company_id")
+            inflow_form_id_raw = params.get("inflow_form_id")
+            try:
+                payloads = await request.json()
+            except json.JSONDecodeError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid JSON body: {str(e)}"
+                )
+            if not isinstance(payloads, list):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="JSON body must be an array of payload objects"
+                )
+        
+        try:
+            company_id = int(company_id_raw)
+            inflow_form_id = int(inflow_form_id_raw)
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="company_id and inflow_form_id are required and must be valid integers"
+            )
+        if not payloads:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No rows to import"
+            )
+        if len(payloads) > BULK_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many rows: {len(payloads)} (maximum {BULK_IMPORT_MAX_ROWS} per request)"
+            )
+        
+        # Validate company and form once for the whole import
+        company = await db.get(Company, company_id)
+        if not company:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Company with id {company_id} not found"
+            )
+        inflow_form = await db.run_sync(get_form, inflow_form_id)
+        if not inflow_form:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Inflow form with id {inflow_form_id} not found"
+            )
+        
+        # One timestamp from the database clock for every row, so rollup days match DATE(created_at)
+        imported_at = (await db.execute(select(func.current_timestamp()))).scalar()
+        rows, errors = prepare_entry_rows(payloads, company_id, inflow_form_id, inflow_form.fields, imported_at)
+        
+        inserted = 0
+        for start in range(0, len(rows), BULK_IMPORT_CHUNK_SIZE):
+            chunk = rows[start:start + BULK_IMPORT_CHUNK_SIZE]
+            chunk_rows = [row for _, row in chunk]
+            try:
+                await db.execute(insert(InflowEntryPayload), chunk_rows)
+                await db.run_sync(upsert_rollup_rows, rollup_rows_for(chunk_rows))
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                print(f"✗ Bulk import chunk failed: {str(e)}")
+                errors.extend({"row": row_number, "errors": [f"Database error: {str(e)}"]} for row_number, _ in chunk)
+                continue
+            inserted += len(chunk_rows)
+            chunk_counts = {}
+            for row in chunk_rows:
+                key = (row["company_id"], row["inflow_form_id"], row["mode"])
+                chunk_counts[key] = chunk_counts.get(key, 0) + 1
+            for key, count in chunk_counts.items():
+                entry_count_cache.increment(*key, delta=count)
+        
+        errors.sort(key=lambda error: error["row"])
+        print(f"✓ Bulk import for company {company_id}, form {inflow_form_id}: {inserted} inserted, {len(errors)} failed")
+        return {
+            "success": not errors,
+            "message": f"Imported {inserted} of {len(payloads)} transactions",
+            "total": len(payloads),
+            "inserted": inserted,
+            "failed": len(errors),
+            "errors": errors
+        }
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error importing transactions: {str(e)}"
+        )
+
+
+def iter_bulk_entry_chunks(db: Session, body: InflowEntryBulkSelect, *columns):
+    """
+    Yield the selected entries in chunks of BULK_MUTATION_CHUNK_SIZE rows (columns plus id)
+    
+    Without an id list the table is walked in id order, so a chunk that was
+    deleted or changed by the caller is never selected again.
+    """
+    if body.ids is None and body.company_id is None and body.inflow_form_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids, company_id or inflow_form_id is required"
+        )
+    base = filter_flow_entries(
+        select(InflowEntryPayload.id, *columns),
+        company_id=body.company_id,
+        inflow_form_id=body.inflow_form_id,
+        from_date=body.from_date,
+        to_date=body.to_date,
+    )
+    if body.ids is not None:
+        ids = sorted(set(body.ids))
+        for start in range(0, len(ids), BULK_MUTATION_CHUNK_SIZE):
+            chunk_ids = ids[start:start + BULK_MUTATION_CHUNK_SIZE]
+            rows = db.execute(base.where(InflowEntryPayload.id.in_(chunk_ids))).all()
+            if rows:
+                yield rows
+        return
+    last_id = 0
+    while True:
+        rows = db.execute(
+            base.where(InflowEntryPayload.id > last_id)
+            .order_by(InflowEntryPayload.id)
+            .limit(BULK_MUTATION_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+@app.delete("/api/delete-transactions/bulk", status_code=status.HTTP_200_OK)
+def delete_transactions_bulk(body: InflowEntryBulkDelete, db: Session = Depends(get_db)):
+    """
+    Delete many inflow entries (transactions) by id list and/or filter.
+    
+    - **ids**: Inflow entry IDs (optional)
+    - **company_id** / **inflow_form_id**: Restrict to a company / form (optional)
+    - **from_date** / **to_date**: Inclusive txn_date range (optional)
+    
+    At least one of ids, company_id or inflow_form_id is required. Entries are deleted
+    with set-based DELETEs of BULK_MUTATION_CHUNK_SIZE rows, one transaction each;
+    attachments are removed by the database's ON DELETE CASCADE.
+    """
+    deleted = 0
+    attachments_deleted = 0
+    try:
+        for rows in iter_bulk_entry_chunks(
+            db, body, InflowEntryPayload.company_id, InflowEntryPayload.inflow_form_id, InflowEntryPayload.mode
+        ):
+            chunk_ids = [row.id for row in rows]
+            chunk_attachments = db.execute(
+                select(func.count(InflowEntryAttachment.id)).where(InflowEntryAttachment.inflow_entry_id.in_(chunk_ids))
+            ).scalar()
+            apply_entries_to_rollup(db, chunk_ids, -1)
+            release_attachment_blobs(db, InflowEntryAttachment.inflow_entry_id.in_(chunk_ids))
+            db.execute(
+                delete(InflowEntryPayload)
+                .where(InflowEntryPayload.id.in_(chunk_ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            deleted += len(chunk_ids)
+            attachments_deleted += chunk_attachments
+            for row in rows:
+                entry_count_cache.decrement(row.company_id, row.inflow_form_id, row.mode)
+        return {
+            "success": True,
+            "message": f"{deleted} transaction(s) deleted successfully",
+            "deleted": deleted,
+            "attachments_deleted": attachments_deleted
+        }
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error deleting inflow entries after {deleted} deleted: {str(e)}"
+        )
+
+
+@app.put("/api/edit-transactions/bulk", status_code=status.HTTP_200_OK)
+def edit_transactions_bulk(body: InflowEntryBulkEdit, db: Session = Depends(get_db)):
+    """
+    Apply the same edit to many inflow entries (transactions) selected by id list and/or filter.
+    
+    - **ids** / **company_id** / **inflow_form_id** / **from_date** / **to_date**: Selection, as for bulk delete
+    - **payload**: Keys merged into each entry's payload (shallow merge, as edit-transaction)
+    - **mode**, **bank_name**, **bank_account_number**: Values set on each entry (outside payload)
+    
+    Each chunk of BULK_MUTATION_CHUNK_SIZE entries is read without loading ORM objects,
+    merged in memory and written back with one executemany UPDATE, one transaction per chunk.
+    """
+    if body.payload is None and body.mode is None and body.bank_name is None and body.bank_account_number is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nothing to update: provide payload, mode, bank_name or bank_account_number"
+        )
+    updated = 0
+    try:
+        for rows in iter_bulk_entry_chunks(
+            db, body,
+            InflowEntryPayload.company_id,
+            InflowEntryPayload.inflow_form_id,
+            InflowEntryPayload.payload,
+            InflowEntryPayload.mode,
+        ):
+            changes = []
+            changed_modes = set()
+            for row in rows:
+                current = {**(row.payload or {}), **(body.payload or {})}
+                if body.mode is not None:
+                    current["mode"] = body.mode
+                if body.bank_name is not None:
+                    current["bank_name"] = body.bank_name
+                if body.bank_account_number is not None:
+                    current["bank_account_number"] = body.bank_account_number
+                fields = get_form_fields(db, row.inflow_form_id)
+                amount, txn_date = extract_amount_and_txn_date(current, fields)
+                change = {
+                    "id": row.id,
+                    "payload": current,
+                    "mode": body.mode if body.mode is not None else current.get("mode"),
+                    "bank_name": body.bank_name if body.bank_name is not None else current.get("bank_name"),
+                    "bank_account_number": body.bank_account_number if body.bank_account_number is not None else current.get("bank_account_number"),
+                    "amount": amount,
+                    "txn_date": txn_date,
+                    "search_text": build_search_text(current, fields),
+                }
+                changes.append(change)
+                if change["mode"] != row.mode:
+                    changed_modes.add((row.company_id, row.inflow_form_id, row.mode))
+                    changed_modes.add((row.company_id, row.inflow_form_id, change["mode"]))
+            chunk_ids = [row.id for row in rows]
+            apply_entries_to_rollup(db, chunk_ids, -1)
+            db.execute(update(InflowEntryPayload), changes)
+            apply_entries_to_rollup(db, chunk_ids, 1)
+            db.commit()
+            updated += len(changes)
+            for key in changed_modes:
+                entry_count_cache.invalidate(*key)
+        return {
+            "success": True,
+            "message": f"{updated} transaction(s) updated successfully",
+            "updated": updated
+        }
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating inflow entries after {updated} updated: {str(e)}"
+        )
+
+
 # JSON Endpoint for add-transaction (alternative to form-data endpoint)
 
 # @app.post("/api/add-transaction-json", response_model=InflowEntryCreateResponse, status_code=status.HTTP_201_CREATED)
@@ -1860,6 +2472,39 @@ def delete_transaction(body: InflowEntryDelete, db: Session = Depends(get_db)):
 
 # Presigned URL Regeneration Endpoint
 
+@app.post("/api/admin/refresh-attachment-urls", status_code=status.HTTP_202_ACCEPTED)
+def refresh_attachment_urls_endpoint(
+    batch_size: int = Query(1000, ge=1, le=10000, description="Rows per chunk (one transaction each)"),
+    min_remaining_hours: float = Query(24, ge=0, description="Re-sign URLs that expire within this many hours"),
+    refresh_all: bool = Query(False, description="Re-sign every URL in our bucket regardless of expiry"),
+):
+    """
+    Re-sign expired presigned URLs stored in attachment file_url, in the background
+    
+    - **batch_size**: Rows per chunk (default 1000)
+    - **min_remaining_hours**: Re-sign URLs that expire within this many hours (default 24)
+    - **refresh_all**: Re-sign every URL regardless of expiry
+    
+    Same job as refresh_attachment_urls.py, resuming from its checkpoint. Returns 409
+    if a run is already in progress; follow it with GET /api/admin/refresh-attachment-urls.
+    """
+    min_remaining = None if refresh_all else timedelta(hours=min_remaining_hours)
+    if not start_refresh(batch_size, min_remaining):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="An attachment URL refresh is already running"
+        )
+    return {"success": True, "message": "Attachment URL refresh started", "data": dict(refresh_progress)}
+
+
+@app.get("/api/admin/refresh-attachment-urls", status_code=status.HTTP_200_OK)
+def get_refresh_attachment_urls_progress():
+    """
+    Progress of the last attachment URL refresh started on this worker
+    """
+    return {"success": True, "data": dict(refresh_progress)}
+
+
 # @app.post("/api/regenerate-presigned-url", response_model=PresignedUrlResponse, status_code=status.HTTP_200_OK)
 # async def regenerate_presigned_url_endpoint(
 #     file_url: str = Form(..., description="Existing Railway Storage URL (can be expired)"),
@@ -1977,54 +2622,281 @@ def delete_transaction(body: InflowEntryDelete, db: Session = Depends(get_db)):
 
 # List Inflow Entries with Filters
 
+def filter_flow_entries(
+    query,
+    company_id: Optional[int] = None,
+    inflow_form_id: Optional[int] = None,
+    mode: Optional[str] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    bank_name: Optional[str] = None,
+    bank_account_number: Optional[str] = None,
+):
+    """
+    Apply the /api/flow-entries filters to a Query or Select over InflowEntryPayload
+    
+    All filters use real columns (mode, bank_name and bank_account_number are kept
+    in sync with the payload by the write paths and reconcile_entry_columns.py).
+    Amount and date bounds are inclusive.
+    """
+    if company_id is not None:
+        query = query.filter(InflowEntryPayload.company_id == company_id)
+    
+    if inflow_form_id is not None:
+        query = query.filter(InflowEntryPayload.inflow_form_id == inflow_form_id)
+    
+    if mode:
+        query = query.filter(InflowEntryPayload.mode == mode)
+    
+    if bank_name:
+        query = query.filter(InflowEntryPayload.bank_name == bank_name)
+    
+    if bank_account_number:
+        query = query.filter(InflowEntryPayload.bank_account_number == bank_account_number)
+    
+    if min_amount is not None:
+        query = query.filter(InflowEntryPayload.amount >= min_amount)
+    
+    if max_amount is not None:
+        query = query.filter(InflowEntryPayload.amount <= max_amount)
+    
+    if from_date is not None:
+        query = query.filter(InflowEntryPayload.txn_date >= from_date)
+    
+    if to_date is not None:
+        query = query.filter(InflowEntryPayload.txn_date <= to_date)
+    
+    return query
+
+
+def search_flow_entries(query, q: str, dialect_name: str):
+    """
+    Restrict a Query or Select over InflowEntryPayload to entries whose search_text matches q,
+    ordered by relevance (best first)
+    
+    Uses the FULLTEXT index on MySQL; other databases fall back to a substring match
+    ordered by newest first.
+    """
+    if dialect_name == "mysql":
+        relevance = match(InflowEntryPayload.search_text, against=q).in_natural_language_mode()
+        return query.filter(relevance > 0).order_by(relevance.desc(), InflowEntryPayload.id.desc())
+    return query.filter(InflowEntryPayload.search_text.contains(q, autoescape=True)).order_by(InflowEntryPayload.id.desc())
+
+
+# sort parameter -> (column, descending, parser for cursor values)
+ENTRY_SORTS = {
+    "created_at_desc": (InflowEntryPayload.created_at, True, datetime.fromisoformat),
+    "created_at_asc": (InflowEntryPayload.created_at, False, datetime.fromisoformat),
+    "txn_date_desc": (InflowEntryPayload.txn_date, True, date.fromisoformat),
+    "txn_date_asc": (InflowEntryPayload.txn_date, False, date.fromisoformat),
+    "amount_desc": (InflowEntryPayload.amount, True, Decimal),
+    "amount_asc": (InflowEntryPayload.amount, False, Decimal),
+}
+
+
+def encode_entry_cursor(sort: str, value, entry_id: int) -> str:
+    """
+    Encode the sort value and id of the last entry on a page into an opaque cursor
+    """
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    elif value is not None:
+        value = str(value)
+    raw = json.dumps({"s": sort, "v": value, "i": entry_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_entry_cursor(cursor: str, sort: str):
+    """
+    Decode a cursor produced by encode_entry_cursor back into (sort value, id)
+    
+    Raises HTTPException (400) if the cursor is malformed or was issued for a different sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        if "c" in data:
+            # Cursors issued before sort support always used created_at_desc
+            data = {"s": "created_at_desc", "v": data["c"], "i": data["i"]}
+        if data["s"] != sort:
+            raise ValueError("cursor sort mismatch")
+        parse = ENTRY_SORTS[sort][2]
+        value = parse(data["v"]) if data["v"] is not None else None
+        return value, int(data["i"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def seek_after(query, sort: str, value, entry_id: int):
+    """
+    Keyset condition for rows after (value, id) in the given sort order
+    
+    NULL sort values come first in ascending and last in descending order (MySQL semantics)
+    """
+    column, descending, _ = ENTRY_SORTS[sort]
+    if descending:
+        if value is None:
+            return query.filter(column.is_(None), InflowEntryPayload.id < entry_id)
+        return query.filter(
+            or_(
+                column < value,
+                and_(column == value, InflowEntryPayload.id < entry_id),
+                column.is_(None),
+            )
+        )
+    if value is None:
+        return query.filter(
+            or_(
+                and_(column.is_(None), InflowEntryPayload.id > entry_id),
+                column.isnot(None),
+            )
+        )
+    return query.filter(
+        or_(
+            column > value,
+            and_(column == value, InflowEntryPayload.id > entry_id),
+        )
+    )
+
+
 @app.get("/api/flow-entries", status_code=status.HTTP_200_OK)
 async def list_inflow_entries(
+    request: Request,
+    response: Response,
     company_id: Optional[int] = None,
     inflow_form_id: Optional[int] = None,
-    mode: Optional[str] = None,  # mode from payload
+    mode: Optional[str] = None,
+    bank_name: Optional[str] = None,
+    bank_account_number: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    sort: str = "created_at_desc",
+    q: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List inflow entries with optional filters.
     
-    Returns: { "success": true, "total": n, "skip": skip, "limit": limit, "data": [...] }
+    Returns: { "success": true, "total": n, "skip": skip, "limit": limit, "next_cursor": "...", "data": [...] }
     
     - **company_id**: Filter by company ID (optional)
     - **inflow_form_id**: Filter by inflow form ID (optional)
-    - **mode**: Filter by mode from payload JSON (optional, e.g., "BANK", "CASH", "UPI")
-    - **skip**: Number of records to skip (for pagination)
-    - **limit**: Maximum number of records to return
+    - **mode**: Filter by mode (optional, e.g., "BANK", "CASH", "UPI")
+    - **bank_name**: Filter by bank name (optional, exact match)
+    - **bank_account_number**: Filter by bank account number (optional, exact match)
+    - **skip**: Number of records to skip (for pagination, kept for older clients)
+    - **limit**: Maximum number of records to return (1-1000, default 100)
+    - **cursor**: Opaque cursor from the previous page's next_cursor (fast path; skip is ignored when set)
+    - **include_total**: Set to false to skip counting matching entries ("total" is then null)
+    - **min_amount** / **max_amount**: Inclusive amount range (optional)
+    - **from_date** / **to_date**: Inclusive transaction date range (optional, YYYY-MM-DD)
+    - **sort**: created_at_desc (default), created_at_asc, txn_date_desc, txn_date_asc, amount_desc or amount_asc
+    - **q**: Full-text search over the entry's TEXT / TEXTAREA fields (remarks, cheque numbers,
+      party names). Results are ranked by relevance, so sort and cursor are ignored; page with skip.
+    
+    next_cursor is null on the last page. Totals are served from an in-process
+    cache that add/edit/delete-transaction keep up to date.
+    
+    The page's ids and row versions are selected first and hashed into an ETag;
+    a matching If-None-Match gets an empty 304 without loading payloads or attachments.
     """
     try:
-        query = db.query(InflowEntryPayload)
-        
-        if company_id is not None:
-            query = query.filter(InflowEntryPayload.company_id == company_id)
-        
-        if inflow_form_id is not None:
-            query = query.filter(InflowEntryPayload.inflow_form_id == inflow_form_id)
-        
-        if mode:
-            try:
-                query = query.filter(
-                    InflowEntryPayload.payload['mode'].astext == mode
-                )
-            except Exception:
-                from sqlalchemy import text
-                query = query.filter(
-                    text("JSON_EXTRACT(payload, '$.mode') = :mode")
-                ).params(mode=mode)
+        if sort not in ENTRY_SORTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"sort must be one of: {', '.join(ENTRY_SORTS)}"
+            )
         
-        total_count = query.count()
-        entries = query.order_by(InflowEntryPayload.created_at.desc()).offset(skip).limit(limit).all()
+        query = filter_flow_entries(
+            select(InflowEntryPayload),
+            company_id=company_id,
+            inflow_form_id=inflow_form_id,
+            mode=mode,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            from_date=from_date,
+            to_date=to_date,
+            bank_name=bank_name,
+            bank_account_number=bank_account_number,
+        )
+        q = q.strip() if q else None
+        if q:
+            query = search_flow_entries(query, q, db.get_bind().dialect.name)
+        
+        total_count = None
+        if include_total:
+            # The count cache only covers the company/form/mode filters
+            cacheable = all(
+                not v for v in (min_amount, max_amount, from_date, to_date, bank_name, bank_account_number, q)
+            )
+            count_key = (company_id, inflow_form_id, mode or None)
+            total_count = entry_count_cache.get(count_key) if cacheable else None
+            if total_count is None:
+                generation = entry_count_cache.generation
+                total_count = (await db.execute(
+                    select(func.count()).select_from(query.order_by(None).subquery())
+                )).scalar()
+                if cacheable:
+                    entry_count_cache.set(count_key, total_count, generation)
+        
+        # Keyset pagination: seek past the last (sort value, id) seen instead of
+        # scanning and discarding `skip` rows. Search results are already ranked.
+        if cursor and not q:
+            cursor_value, cursor_id = decode_entry_cursor(cursor, sort)
+            query = seek_after(query, sort, cursor_value, cursor_id)
+        sort_column, descending, _ = ENTRY_SORTS[sort]
+        if not q:
+            if descending:
+                query = query.order_by(sort_column.desc(), InflowEntryPayload.id.desc())
+            else:
+                query = query.order_by(sort_column.asc(), InflowEntryPayload.id.asc())
+        if (q or not cursor) and skip:
+            query = query.offset(skip)
+        
+        # Select only (id, version, sort value) for the page, plus one extra row
+        # to know whether another page exists
+        page = (await db.execute(
+            query.with_only_columns(InflowEntryPayload.id, InflowEntryPayload.version, sort_column).limit(limit + 1)
+        )).all()
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            if not q:
+                next_cursor = encode_entry_cursor(sort, page[-1][2], page[-1].id)
+        
+        # Attachment URLs are signed on read, so the ETag also changes with the signing window
+        etag = compute_etag(
+            "flow-entries", total_count, next_cursor, signed_url_epoch(), [(row.id, row.version) for row in page]
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+        
+        # Load the page's rows, and their attachments in one SELECT ... WHERE inflow_entry_id IN (...)
+        page_ids = [row.id for row in page]
+        entries_by_id = {
+            entry.id: entry
+            for entry in (await db.execute(
+                select(InflowEntryPayload)
+                .options(selectinload(InflowEntryPayload.attachments))
+                .where(InflowEntryPayload.id.in_(page_ids))
+            )).scalars()
+        } if page_ids else {}
+        entries = [entries_by_id[entry_id] for entry_id in page_ids if entry_id in entries_by_id]
         
         result = []
         for entry in entries:
-            attachments = db.query(InflowEntryAttachment).filter(
-                InflowEntryAttachment.inflow_entry_id == entry.id
-            ).all()
             payload = entry.payload or {}
             entry_data = {
                 "id": entry.id,
@@ -2033,16 +2905,22 @@ async def list_inflow_entries(
                 "mode": entry.mode or payload.get("mode"),
                 "bank_name": entry.bank_name or payload.get("bank_name"),
                 "bank_account_number": entry.bank_account_number or payload.get("bank_account_number"),
+                "amount": entry.amount,
+                "txn_date": entry.txn_date,
                 "payload": entry.payload,
                 "created_at": entry.created_at,
                 "attachments": [
                     {
                         "id": att.id,
                         "inflow_entry_id": att.inflow_entry_id,
-                        "file_url": att.file_url,
+                        "file_url": attachment_file_url(att),
+                        "preview_url": rendition_url(att.preview_key),
+                        "thumbnail_url": rendition_url(att.thumbnail_key),
+                        "status": att.status,
+                        "last_error": att.last_error,
                         "created_at": att.created_at
                     }
-                    for att in attachments
+                    for att in entry.attachments
                 ]
             }
             result.append(entry_data)
@@ -2052,9 +2930,12 @@ async def list_inflow_entries(
             "total": total_count,
             "skip": skip,
             "limit": limit,
+            "next_cursor": next_cursor,
             "data": result
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -2062,6 +2943,370 @@ async def list_inflow_entries(
         )
 
 
+# Streaming export of Inflow Entries
+
+EXPORT_YIELD_PER = 1000  # rows fetched per round trip from the server-side cursor
+EXPORT_LINES_PER_CHUNK = 500  # NDJSON lines buffered per chunk sent to the client
+
+
+def _json_default(value):
+    """
+    json.dumps fallback for values coming straight from database rows
+    """
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def iter_flow_entries_ndjson(**filters):
+    """
+    Yield matching inflow entries as NDJSON, one entry (with its attachments) per line
+    
+    filters are passed straight to filter_flow_entries.
+    
+    Rows come from a server-side cursor over entries outer-joined to attachments,
+    ordered by entry id so each entry's attachment rows arrive together. Only one
+    entry and one chunk of lines are held in memory at a time. Uses its own
+    session because the generator outlives the request handler.
+    """
+    db = SessionLocal()
+    try:
+        stmt = filter_flow_entries(
+            select(
+                InflowEntryPayload.id,
+                InflowEntryPayload.company_id,
+                InflowEntryPayload.inflow_form_id,
+                InflowEntryPayload.mode,
+                InflowEntryPayload.bank_name,
+                InflowEntryPayload.bank_account_number,
+                InflowEntryPayload.amount,
+                InflowEntryPayload.txn_date,
+                InflowEntryPayload.payload,
+                InflowEntryPayload.created_at,
+                InflowEntryAttachment.id.label("attachment_id"),
+                InflowEntryAttachment.file_url,
+                InflowEntryAttachment.storage_key,
+                InflowEntryAttachment.preview_key,
+                InflowEntryAttachment.thumbnail_key,
+                InflowEntryAttachment.status,
+                InflowEntryAttachment.created_at.label("attachment_created_at"),
+            ).outerjoin(
+                InflowEntryAttachment,
+                InflowEntryAttachment.inflow_entry_id == InflowEntryPayload.id,
+            ),
+            **filters
+        ).order_by(InflowEntryPayload.id, InflowEntryAttachment.id)
+        
+        rows = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_YIELD_PER))
+        
+        lines = []
+        current = None
+        for row in rows:
+            if current is None or current["id"] != row.id:
+                if current is not None:
+                    lines.append(json.dumps(current, default=_json_default))
+                    if len(lines) >= EXPORT_LINES_PER_CHUNK:
+                        yield "\n".join(lines) + "\n"
+                        lines = []
+                payload = row.payload or {}
+                current = {
+                    "id": row.id,
+                    "company_id": row.company_id,
+                    "inflow_form_id": row.inflow_form_id,
+                    "mode": row.mode or payload.get("mode"),
+                    "bank_name": row.bank_name or payload.get("bank_name"),
+                    "bank_account_number": row.bank_account_number or payload.get("bank_account_number"),
+                    "amount": row.amount,
+                    "txn_date": row.txn_date,
+                    "payload": row.payload,
+                    "created_at": row.created_at,
+                    "attachments": [],
+                }
+            if row.attachment_id is not None:
+                current["attachments"].append({
+                    "id": row.attachment_id,
+                    "inflow_entry_id": row.id,
+                    "file_url": attachment_file_url(row),
+                    "preview_url": rendition_url(row.preview_key),
+                    "thumbnail_url": rendition_url(row.thumbnail_key),
+                    "status": row.status,
+                    "created_at": row.attachment_created_at
+                })
+        if current is not None:
+            lines.append(json.dumps(current, default=_json_default))
+        if lines:
+            yield "\n".join(lines) + "\n"
+    finally:
+        db.close()
+
+
+@app.get("/api/flow-entries/export", status_code=status.HTTP_200_OK)
+def export_inflow_entries(
+    company_id: Optional[int] = None,
+    inflow_form_id: Optional[int] = None,
+    mode: Optional[str] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    bank_name: Optional[str] = None,
+    bank_account_number: Optional[str] = None,
+):
+    """
+    Export all matching inflow entries as NDJSON in a single streamed response.
+    
+    Each line is one entry in the same shape as /api/flow-entries "data" items.
+    Entries are streamed in id order from a server-side cursor, so memory use
+    stays flat regardless of how many rows are exported.
+    
+    - **company_id**: Filter by company ID (optional)
+    - **inflow_form_id**: Filter by inflow form ID (optional)
+    - **mode**: Filter by mode (optional, e.g., "BANK", "CASH", "UPI")
+    - **min_amount** / **max_amount**: Inclusive amount range (optional)
+    - **from_date** / **to_date**: Inclusive transaction date range (optional, YYYY-MM-DD)
+    - **bank_name** / **bank_account_number**: Exact-match filters (optional)
+    """
+    return StreamingResponse(
+        iter_flow_entries_ndjson(
+            company_id=company_id,
+            inflow_form_id=inflow_form_id,
+            mode=mode,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            from_date=from_date,
+            to_date=to_date,
+            bank_name=bank_name,
+            bank_account_number=bank_account_number,
+        ),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="flow-entries.ndjson"'},
+    )
+
+
+def iter_flow_entry_records(
+    sources: dict,
+    company_id: Optional[int] = None,
+    inflow_form_ids: Optional[List[int]] = None,
+    mode: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+):
+    """
+    Yield flattened entry records for a table export from a server-side cursor
+    
+    Uses its own session because the generator outlives the request handler.
+    """
+    db = SessionLocal()
+    try:
+        stmt = filter_flow_entries(
+            select(
+                InflowEntryPayload.id,
+                InflowEntryPayload.company_id,
+                InflowEntryPayload.inflow_form_id,
+                InflowEntryPayload.mode,
+                InflowEntryPayload.bank_name,
+                InflowEntryPayload.bank_account_number,
+                InflowEntryPayload.payload,
+                InflowEntryPayload.created_at,
+            ),
+            company_id=company_id,
+            mode=mode,
+            from_date=from_date,
+            to_date=to_date,
+        ).where(InflowEntryPayload.inflow_form_id.in_(inflow_form_ids))
+        stmt = stmt.order_by(InflowEntryPayload.id)
+        
+        for row in db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_YIELD_PER)):
+            yield flatten_entry(row, sources)
+    finally:
+        db.close()
+
+
+@app.get("/api/flow-entries/export/table", status_code=status.HTTP_200_OK)
+def export_inflow_entries_table(
+    format: str = "csv",
+    company_id: Optional[int] = None,
+    inflow_form_id: Optional[List[int]] = Query(None),
+    mode: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Export inflow entries as a spreadsheet-friendly CSV or Parquet file.
+    
+    Payload JSON is flattened into one column per field_key declared on the
+    selected forms; NUMBER fields become decimals and DATE fields become dates.
+    The file is streamed (Parquet one row group at a time), never built in memory.
+    
+    - **format**: "csv" (default) or "parquet"
+    - **company_id**: Filter by company ID (optional)
+    - **inflow_form_id**: Form IDs to include, repeat for several (optional, default all forms)
+    - **mode**: Filter by mode (optional)
+    - **from_date** / **to_date**: Inclusive transaction date range (optional, YYYY-MM-DD)
+    """
+    export_format = format.lower()
+    if export_format not in ("csv", "parquet"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be 'csv' or 'parquet'"
+        )
+    if export_format == "parquet" and not PYARROW_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export is unavailable: pyarrow is not installed"
+        )
+    
+    # Read each selected form's field definitions once, up front
+    forms_query = db.query(InflowForm).options(selectinload(InflowForm.fields))
+    if inflow_form_id:
+        forms_query = forms_query.filter(InflowForm.id.in_(inflow_form_id))
+    forms = forms_query.order_by(InflowForm.id).all()
+    if inflow_form_id:
+        missing = sorted(set(inflow_form_id) - {form.id for form in forms})
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Inflow form(s) not found: {', '.join(str(m) for m in missing)}"
+            )
+    
+    columns = build_export_columns(forms)
+    records = iter_flow_entry_records(
+        sources={form.id: form.source for form in forms},
+        company_id=company_id,
+        inflow_form_ids=[form.id for form in forms],
+        mode=mode,
+        from_date=from_date,
+        to_date=to_date,
+    )
+    
+    if export_format == "parquet":
+        return StreamingResponse(
+            iter_parquet(records, columns),
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": 'attachment; filename="flow-entries.parquet"'},
+        )
+    return StreamingResponse(
+        iter_csv(records, columns),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="flow-entries.csv"'},
+    )
+
+
+# Cache Statistics
+
+@app.get("/api/cache-stats", status_code=status.HTTP_200_OK)
+def get_cache_stats():
+    """
+    Hit / miss counters and size of this worker's in-process form and signed-URL caches
+    """
+    return {
+        "success": True,
+        "data": {
+            "forms": form_cache.stats(),
+            "signed_urls": signed_url_cache.stats(),
+        }
+    }
+
+
+# Cashflow Summary
+
+@app.get("/api/flow-summary", status_code=status.HTTP_200_OK)
+def get_flow_summary(
+    company_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Inflow / outflow totals and counts grouped by company, month, flow_type, mode and source.
+    
+    Read from the cashflow_daily_rollup table (one row per company, form, mode
+    and day), joined to inflow_forms, so the cost depends on the number of
+    days in range rather than the number of entries. An entry is counted on
+    its txn_date, or on its created_at date when the payload has none.
+    
+    - **company_id**: Restrict to one company (optional)
+    - **from_date** / **to_date**: Inclusive date range on the same day (optional)
+    """
+    try:
+        rollup = CashflowDailyRollup
+        year = extract("year", rollup.day).label("year")
+        month = extract("month", rollup.day).label("month")
+        entry_mode = func.coalesce(func.nullif(rollup.mode, ""), InflowForm.mode).label("mode")
+        entry_count = func.sum(rollup.entry_count)
+        
+        stmt = (
+            select(
+                rollup.company_id,
+                year,
+                month,
+                InflowForm.flow_type,
+                entry_mode,
+                InflowForm.source,
+                func.coalesce(func.sum(rollup.total_amount), 0).label("total_amount"),
+                entry_count.label("count"),
+            )
+            .join(InflowForm, InflowForm.id == rollup.inflow_form_id)
+            .group_by(
+                rollup.company_id,
+                year,
+                month,
+                InflowForm.flow_type,
+                entry_mode,
+                InflowForm.source,
+            )
+            .having(entry_count > 0)
+            .order_by(rollup.company_id, year, month)
+        )
+        if company_id is not None:
+            stmt = stmt.where(rollup.company_id == company_id)
+        if from_date is not None:
+            stmt = stmt.where(rollup.day >= from_date)
+        if to_date is not None:
+            stmt = stmt.where(rollup.day <= to_date)
+        
+        _val = lambda e: e.value if hasattr(e, "value") else e
+        rows = []
+        totals = {"inflow": Decimal("0"), "inflow_count": 0, "outflow": Decimal("0"), "outflow_count": 0}
+        for row in db.execute(stmt):
+            flow_type = _val(row.flow_type)
+            total_amount = Decimal(row.total_amount)
+            count = int(row.count)
+            rows.append({
+                "company_id": row.company_id,
+                "month": f"{int(row.year):04d}-{int(row.month):02d}" if row.year is not None else None,
+                "flow_type": flow_type,
+                "mode": row.mode,
+                "source": row.source,
+                "total_amount": total_amount,
+                "count": count,
+            })
+            if flow_type == "INFLOW":
+                totals["inflow"] += total_amount
+                totals["inflow_count"] += count
+            elif flow_type == "OUTFLOW":
+                totals["outflow"] += total_amount
+                totals["outflow_count"] += count
+        totals["net"] = totals["inflow"] - totals["outflow"]
+        
+        return {
+            "success": True,
+            "message": "Cashflow summary fetched successfully",
+            "data": {
+                "totals": totals,
+                "groups": rows
+            }
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching cashflow summary: {str(e)}"
+        )
+
+
 # Alternative endpoint with JSON response including metadata
 
 # @app.get("/api/inflow-entries-with-meta")
@@ -0,0 +1,119 @@
+"""
+Apply versioned schema migrations from the migrations/ package
+
+Run once per release, before the new web workers start:
+    python migrate.py            # apply pending migrations
+    python migrate.py --status   # show current and latest version
+
+Web workers only call check_schema_version() at startup, a single SELECT.
+"""
+import argparse
+import importlib
+import os
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select, text
+
+from database import engine
+from models import SchemaVersion
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+_MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+# MySQL named lock so two release runs cannot apply migrations concurrently
+_LOCK_NAME = "cashflow_schema_migrate"
+_LOCK_TIMEOUT_SECONDS = 60
+
+
+def list_migrations() -> List[Tuple[int, str]]:
+    """
+    Return (version, module_name) for every script in migrations/, in version order
+    """
+    found = []
+    for file_name in os.listdir(MIGRATIONS_DIR):
+        match = _MIGRATION_FILE.match(file_name)
+        if match:
+            found.append((int(match.group(1)), file_name[:-3]))
+    return sorted(found)
+
+
+def latest_version() -> int:
+    migrations = list_migrations()
+    return migrations[-1][0] if migrations else 0
+
+
+def current_version(conn) -> Optional[int]:
+    """
+    Highest applied version, 0 if none, or None if schema_version does not exist
+    """
+    try:
+        return conn.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+    except Exception:
+        return None
+
+
+def migrate():
+    """
+    Apply every migration newer than the recorded schema version
+    """
+    with engine.connect() as conn:
+        is_mysql = conn.dialect.name == "mysql"
+        if is_mysql:
+            got_lock = conn.execute(
+                text("SELECT GET_LOCK(:name, :timeout)"),
+                {"name": _LOCK_NAME, "timeout": _LOCK_TIMEOUT_SECONDS},
+            ).scalar()
+            conn.commit()
+            if got_lock != 1:
+                raise Exception("Could not acquire the migration lock; is another migration running?")
+        try:
+            SchemaVersion.__table__.create(bind=conn, checkfirst=True)
+            conn.commit()
+            version = current_version(conn) or 0
+            pending = [(v, name) for v, name in list_migrations() if v > version]
+            if not pending:
+                print(f"✓ Schema is up to date (version {version})")
+                return
+            for v, module_name in pending:
+                module = importlib.import_module(f"migrations.{module_name}")
+                print(f"Applying migration {module_name}...")
+                # MySQL commits DDL implicitly; the version row is written only once the script succeeded
+                module.upgrade(conn)
+                conn.execute(SchemaVersion.__table__.insert().values(version=v, name=module_name))
+                conn.commit()
+                print(f"✓ Applied migration {module_name}")
+        finally:
+            if is_mysql:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": _LOCK_NAME})
+                conn.commit()
+
+
+def check_schema_version():
+    """
+    Cheap startup check: warn if the database is behind the migrations shipped with this code
+    """
+    try:
+        with engine.connect() as conn:
+            version = current_version(conn)
+    except Exception as e:
+        print(f"Warning: Could not check schema version: {str(e)}")
+        return
+    expected = latest_version()
+    if version is None:
+        print("Warning: schema_version table not found. Run `python migrate.py` before starting the app.")
+    elif version < expected:
+        print(f"Warning: Database schema is at version {version} but the code expects {expected}. Run `python migrate.py`.")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Apply schema migrations")
+    arg_parser.add_argument("--status", action="store_true", help="Show current and latest schema version")
+    args = arg_parser.parse_args()
+
+    if args.status:
+        with engine.connect() as conn:
+            print(f"Current version: {current_version(conn)}")
+        print(f"Latest version: {latest_version()}")
+    else:
+        migrate()
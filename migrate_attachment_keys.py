@@ -0,0 +1,92 @@
+"""
+Fill inflow_entry_attachments.storage_key from the presigned URLs stored in file_url
+
+Walks attachments without a key in primary-key order, one chunk per transaction,
+takes each object key with storage_key_from_url and writes the chunk back with
+one bulk UPDATE. The last processed id is recorded in a checkpoint file
+so an interrupted run resumes where it stopped; it is removed after a complete
+pass. The column is added by migration 0008; run `python migrate.py` first.
+
+file_url is left as it was. URLs that do not point into our bucket, or into a
+folder of the attachment's own entry, get no key and keep being returned as stored.
+
+Usage:
+    python migrate_attachment_keys.py [--batch-size 1000] [--start-after-id N] [--checkpoint-file PATH]
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import select, update
+
+from backfill_entry_columns import clear_checkpoint, read_checkpoint, write_checkpoint
+from database import SessionLocal
+from attachment_blobs import entry_storage_folders
+from models import InflowEntryAttachment, InflowEntryPayload
+from railway_storage import storage_key_from_url
+
+DEFAULT_CHECKPOINT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".migrate_attachment_keys.checkpoint")
+
+
+def migrate_keys(batch_size: int, start_after_id: int, checkpoint_file: str):
+    db = SessionLocal()
+    try:
+        last_id = start_after_id
+        scanned = 0
+        updated = 0
+        started = time.monotonic()
+        while True:
+            rows = db.execute(
+                select(
+                    InflowEntryAttachment.id,
+                    InflowEntryAttachment.file_url,
+                    InflowEntryPayload.company_id,
+                    InflowEntryPayload.inflow_form_id,
+                )
+                .join(InflowEntryPayload, InflowEntryPayload.id == InflowEntryAttachment.inflow_entry_id)
+                .where(
+                    InflowEntryAttachment.id > last_id,
+                    InflowEntryAttachment.storage_key.is_(None),
+                    InflowEntryAttachment.file_url.isnot(None),
+                )
+                .order_by(InflowEntryAttachment.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            changes = []
+            for row in rows:
+                storage_key = storage_key_from_url(row.file_url, *entry_storage_folders(row.company_id, row.inflow_form_id))
+                if storage_key:
+                    changes.append({"id": row.id, "storage_key": storage_key})
+            if changes:
+                db.execute(update(InflowEntryAttachment), changes)
+            db.commit()
+
+            last_id = rows[-1].id
+            scanned += len(rows)
+            updated += len(changes)
+            write_checkpoint(checkpoint_file, last_id)
+            elapsed = time.monotonic() - started
+            print(f"✓ Up to id {last_id}: scanned {scanned}, keyed {updated} ({scanned / elapsed:.0f} rows/s)")
+        clear_checkpoint(checkpoint_file)
+        print(f"Key migration complete: scanned {scanned}, keyed {updated}, left as URL {scanned - updated}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Fill attachment storage keys from stored presigned URLs")
+    arg_parser.add_argument("--batch-size", type=int, default=1000, help="Rows per chunk (one transaction each)")
+    arg_parser.add_argument("--start-after-id", type=int, default=None, help="Ignore the checkpoint and start after this id")
+    arg_parser.add_argument("--checkpoint-file", default=DEFAULT_CHECKPOINT_FILE, help="Where the last processed id is stored")
+    args = arg_parser.parse_args()
+
+    start = args.start_after_id if args.start_after_id is not None else read_checkpoint(args.checkpoint_file)
+    if start:
+        print(f"Resuming after id {start}")
+    migrate_keys(args.batch_size, start, args.checkpoint_file)
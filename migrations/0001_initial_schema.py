@@ -0,0 +1,167 @@
+"""Tables as they were before versioned migrations (adopts databases built by create_all)"""
+from sqlalchemy import (
+    BigInteger, Boolean, Column, Date, DECIMAL, Enum, ForeignKey, Integer, MetaData, String, Table, Text, TIMESTAMP,
+    UniqueConstraint
+)
+from sqlalchemy.dialects.mysql import JSON
+from sqlalchemy.sql import func
+
+# Frozen copy of the models.py tables at this version, so a fresh database gets
+# the same schema here whatever models.py says now; later steps add the rest.
+# Enum columns are native_enum=False VARCHARs, so only their lengths matter.
+
+metadata = MetaData()
+
+
+def _timestamp(name: str, on_update: bool = False) -> Column:
+    return Column(
+        name, TIMESTAMP, server_default=func.current_timestamp(),
+        onupdate=func.current_timestamp() if on_update else None
+    )
+
+
+def _varchar_enum(name: str, length: int, values) -> Column:
+    return Column(name, Enum(*values, native_enum=False, length=length), nullable=False)
+
+
+Table(
+    "customer_receipts", metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("customer_name", String(150), nullable=False),
+    Column("receipt_nature", String(50)),
+    Column("receipt_purpose", String(100)),
+    Column("receipt_date", Date, nullable=False),
+    Column("receipt_type", String(50)),
+    Column("amount", DECIMAL(12, 2), nullable=False),
+    Column("bank_name", String(150), nullable=True),
+    Column("project_name", String(150), nullable=True),
+    Column("company_name", String(150), nullable=True),
+    Column("remarks", Text, nullable=True),
+    _timestamp("created_at"),
+    _timestamp("updated_at", on_update=True),
+)
+
+Table(
+    "inflow_receipt_master", metadata,
+    Column("entity_id", Integer, primary_key=True, autoincrement=True),
+    Column("name", String(150), nullable=False, unique=True),
+)
+
+Table(
+    "bank_loan_receipts", metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("bank_name", String(150), nullable=False),
+    Column("receipt_nature", String(50)),
+    Column("receipt_purpose", String(100)),
+    Column("loan_reference_no", String(100), nullable=True),
+    Column("receipt_date", Date, nullable=False),
+    Column("amount", DECIMAL(14, 2), nullable=False),
+    Column("receipt_mode", String(150), nullable=False),
+    Column("remarks", Text, nullable=True),
+    Column("attachment_path", String(255), nullable=True),
+    _timestamp("created_at"),
+    _timestamp("updated_at", on_update=True),
+)
+
+_PAYMENT_TYPES = ("CASH", "CHEQUE", "BANK_TRANSFER", "UPI", "NEFT", "RTGS", "IMPS")
+
+Table(
+    "vendor_payments", metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("vendor_name", String(150), nullable=False),
+    Column("payment_nature", String(50)),
+    Column("payment_purpose", String(150), nullable=False),
+    Column("service_or_material_details", String(255), nullable=True),
+    Column("payment_date", Date, nullable=False),
+    _varchar_enum("payment_type", 50, _PAYMENT_TYPES),
+    Column("amount", DECIMAL(14, 2), nullable=False),
+    Column("bank_name", String(150), nullable=True),
+    Column("remarks", Text, nullable=True),
+    Column("attachment_path", String(255), nullable=True),
+    _timestamp("created_at"),
+    _timestamp("updated_at", on_update=True),
+)
+
+Table(
+    "employee_payments", metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("employee_name", String(150), nullable=False),
+    Column("employee_id", String(50), nullable=True),
+    Column("payment_nature", String(50)),
+    _varchar_enum("payment_purpose", 100, (
+        "SALARY_PAYMENT", "EXPENSES_REIMBURSEMENT", "INCENTIVE_PAYMENT", "COMMISSION_PAYMENT", "BONUS", "OTHER"
+    )),
+    Column("payment_date", Date, nullable=False),
+    _varchar_enum("payment_type", 50, _PAYMENT_TYPES),
+    Column("amount", DECIMAL(14, 2), nullable=False),
+    Column("bank_name", String(150), nullable=True),
+    Column("remarks", Text, nullable=True),
+    Column("attachment_path", String(255), nullable=True),
+    _timestamp("created_at"),
+    _timestamp("updated_at", on_update=True),
+)
+
+Table(
+    "companies", metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("company_name", String(200), nullable=False),
+    _timestamp("created_at"),
+)
+
+Table(
+    "company_bank_accounts", metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("company_id", BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+    Column("bank_name", String(150), nullable=False),
+    Column("account_number", String(50), nullable=False),
+    _timestamp("created_at"),
+)
+
+Table(
+    "inflow_forms", metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    _varchar_enum("flow_type", 20, ("INFLOW", "OUTFLOW")),
+    _varchar_enum("mode", 20, ("BANK", "CASH", "UPI")),
+    Column("source", String(150), nullable=False),
+    Column("attachment", Integer, nullable=False),
+    _timestamp("created_at"),
+    _timestamp("updated_at", on_update=True),
+)
+
+Table(
+    "inflow_form_fields", metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("inflow_form_id", BigInteger, ForeignKey("inflow_forms.id", ondelete="CASCADE"), nullable=False),
+    Column("field_key", String(100), nullable=False),
+    Column("label", String(150), nullable=False),
+    _varchar_enum("field_type", 20, ("TEXT", "NUMBER", "DATE", "SPINNER", "TEXTAREA")),
+    Column("is_required", Boolean),
+    Column("options", JSON, nullable=True),
+    Column("sort_order", Integer),
+    _timestamp("created_at"),
+    UniqueConstraint("inflow_form_id", "field_key", name="uk_form_field"),
+)
+
+Table(
+    "inflow_entry_payloads", metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("company_id", BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+    Column("inflow_form_id", BigInteger, ForeignKey("inflow_forms.id", ondelete="CASCADE"), nullable=False),
+    Column("payload", JSON, nullable=False),
+    Column("mode", String(50), nullable=True),
+    Column("bank_name", String(150), nullable=True),
+    Column("bank_account_number", String(150), nullable=True),
+    _timestamp("created_at"),
+)
+
+Table(
+    "inflow_entry_attachments", metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("inflow_entry_id", BigInteger, ForeignKey("inflow_entry_payloads.id", ondelete="CASCADE"), nullable=False),
+    Column("file_url", Text, nullable=True),
+    _timestamp("created_at"),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(bind=conn, checkfirst=True)
@@ -0,0 +1,10 @@
+"""Typed amount / txn_date columns on inflow_entry_payloads and the mode listing index"""
+from migrations import add_column_if_missing, create_index_if_missing
+
+
+def upgrade(conn):
+    add_column_if_missing(conn, "inflow_entry_payloads", "amount", "DECIMAL(18, 2) NULL")
+    add_column_if_missing(conn, "inflow_entry_payloads", "txn_date", "DATE NULL")
+    create_index_if_missing(conn, "inflow_entry_payloads", "ix_entry_company_txn_date", ["company_id", "txn_date", "id"])
+    create_index_if_missing(conn, "inflow_entry_payloads", "ix_entry_company_amount", ["company_id", "amount", "id"])
+    create_index_if_missing(conn, "inflow_entry_payloads", "ix_entry_company_mode_created", ["company_id", "mode", "created_at", "id"])
@@ -0,0 +1,14 @@
+"""Indexes for the listing queries on entries, attachments, bank accounts and forms"""
+from migrations import create_index_if_missing
+
+
+def upgrade(conn):
+    # /api/flow-entries default order, with and without a form filter
+    create_index_if_missing(conn, "inflow_entry_payloads", "ix_entry_company_created", ["company_id", "created_at", "id"])
+    create_index_if_missing(conn, "inflow_entry_payloads", "ix_entry_form_created", ["inflow_form_id", "created_at", "id"])
+    # Attachment lookups by entry (selectin load, export join)
+    create_index_if_missing(conn, "inflow_entry_attachments", "ix_attachment_entry", ["inflow_entry_id", "id"])
+    # Bank accounts by company
+    create_index_if_missing(conn, "company_bank_accounts", "ix_bank_account_company", ["company_id", "id"])
+    # /api/flow-forms and /api/flow-forms/sources
+    create_index_if_missing(conn, "inflow_forms", "ix_form_flow_type_mode_updated", ["flow_type", "mode", "updated_at"])
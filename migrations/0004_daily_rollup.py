@@ -0,0 +1,6 @@
+"""Create cashflow_daily_rollup; populate it with `python rebuild_daily_rollup.py`"""
+from models import CashflowDailyRollup
+
+
+def upgrade(conn):
+    CashflowDailyRollup.__table__.create(bind=conn, checkfirst=True)
@@ -0,0 +1,8 @@
+"""search_text column and FULLTEXT index on inflow_entry_payloads; fill it with backfill_entry_columns.py"""
+from migrations import add_column_if_missing, create_index_if_missing
+
+
+def upgrade(conn):
+    add_column_if_missing(conn, "inflow_entry_payloads", "search_text", "TEXT NULL")
+    if conn.dialect.name == "mysql":
+        create_index_if_missing(conn, "inflow_entry_payloads", "ix_entry_search_text", ["search_text"], prefix="FULLTEXT")
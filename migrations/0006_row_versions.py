@@ -0,0 +1,9 @@
+"""Row version counters used to build ETags for the read endpoints"""
+from migrations import add_column_if_missing
+
+VERSIONED_TABLES = ("companies", "company_bank_accounts", "inflow_forms", "inflow_form_fields", "inflow_entry_payloads")
+
+
+def upgrade(conn):
+    for table in VERSIONED_TABLES:
+        add_column_if_missing(conn, table, "version", "INT NOT NULL DEFAULT 1")
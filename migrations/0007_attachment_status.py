@@ -0,0 +1,11 @@
+"""Background upload state on inflow_entry_attachments; existing rows are already uploaded"""
+from migrations import add_column_if_missing, create_index_if_missing
+
+
+def upgrade(conn):
+    add_column_if_missing(conn, "inflow_entry_attachments", "status", "VARCHAR(20) NOT NULL DEFAULT 'UPLOADED'")
+    add_column_if_missing(conn, "inflow_entry_attachments", "file_name", "VARCHAR(255) NULL")
+    add_column_if_missing(conn, "inflow_entry_attachments", "spool_path", "VARCHAR(500) NULL")
+    add_column_if_missing(conn, "inflow_entry_attachments", "attempts", "INT NOT NULL DEFAULT 0")
+    add_column_if_missing(conn, "inflow_entry_attachments", "last_error", "TEXT NULL")
+    create_index_if_missing(conn, "inflow_entry_attachments", "ix_attachment_status", ["status", "id"])
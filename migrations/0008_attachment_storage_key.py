@@ -0,0 +1,6 @@
+"""Object key of each attachment, signed into a URL on read; fill it with migrate_attachment_keys.py"""
+from migrations import add_column_if_missing
+
+
+def upgrade(conn):
+    add_column_if_missing(conn, "inflow_entry_attachments", "storage_key", "VARCHAR(500) NULL")
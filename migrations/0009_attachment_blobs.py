@@ -0,0 +1,10 @@
+"""Content-addressed attachment_blobs and the attachment columns pointing at them; existing attachments keep their own objects"""
+from migrations import add_column_if_missing, create_index_if_missing
+from models import AttachmentBlob
+
+
+def upgrade(conn):
+    AttachmentBlob.__table__.create(bind=conn, checkfirst=True)
+    add_column_if_missing(conn, "inflow_entry_attachments", "content_sha256", "VARCHAR(64) NULL")
+    add_column_if_missing(conn, "inflow_entry_attachments", "blob_id", "BIGINT NULL")
+    create_index_if_missing(conn, "inflow_entry_attachments", "ix_attachment_blob", ["blob_id"])
@@ -0,0 +1,8 @@
+"""Keys of image attachment previews and thumbnails; existing attachments have none"""
+from migrations import add_column_if_missing
+
+
+def upgrade(conn):
+    for table in ("inflow_entry_attachments", "attachment_blobs"):
+        add_column_if_missing(conn, table, "preview_key", "VARCHAR(500) NULL")
+        add_column_if_missing(conn, table, "thumbnail_key", "VARCHAR(500) NULL")
@@ -0,0 +1,6 @@
+"""Lease of the upload attempt working on an attachment; no attempt holds existing rows"""
+from migrations import add_column_if_missing
+
+
+def upgrade(conn):
+    add_column_if_missing(conn, "inflow_entry_attachments", "claimed_at", "TIMESTAMP NULL")
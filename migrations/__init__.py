@@ -0,0 +1,34 @@
+from sqlalchemy import inspect, text
+
+# Helpers for migration scripts. Each script in this package is named
+# NNNN_description.py and defines upgrade(conn); migrate.py applies them in
+# order and records each version in the schema_version table. Steps check the
+# live schema first so a script can run against databases created by an older
+# create_all() as well as fresh ones.
+
+
+def has_column(conn, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def has_index(conn, table: str, name: str) -> bool:
+    return name in {i["name"] for i in inspect(conn).get_indexes(table)}
+
+
+def add_column_if_missing(conn, table: str, column: str, ddl: str):
+    """
+    ALTER TABLE table ADD COLUMN column ddl, unless the column already exists
+    """
+    if not has_column(conn, table, column):
+        print(f"  Adding column {table}.{column}")
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def create_index_if_missing(conn, table: str, name: str, columns, prefix: str = ""):
+    """
+    CREATE [prefix] INDEX name ON table (columns), unless an index with that name exists
+    """
+    if not has_index(conn, table, name):
+        print(f"  Creating index {name} on {table}")
+        kind = f"{prefix} INDEX" if prefix else "INDEX"
+        conn.execute(text(f"CREATE {kind} {name} ON {table} ({', '.join(columns)})"))
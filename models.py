@@ -1,11 +1,16 @@
-from sqlalchemy import Column, BigInteger, Integer, String, Date, Enum, DECIMAL, Text, TIMESTAMP, ForeignKey, Boolean, UniqueConstraint
+from sqlalchemy import Column, BigInteger, Integer, String, Date, Enum, DECIMAL, Text, TIMESTAMP, ForeignKey, Boolean, UniqueConstraint, Index
 from sqlalchemy.dialects.mysql import JSON
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, literal_column
 from database import Base
 import enum
 
 
+def row_version_column():
+    """Counter bumped by every UPDATE of the row; ETags are built from it (see etag.py)"""
+    return Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version + 1"))
+
+
 class ReceiptType(str, enum.Enum):
     CASH = "Cash"
     CHEQUE = "Cheque"
@@ -164,6 +169,7 @@ class Company(Base):
     id = Column(BigInteger, primary_key=True, autoincrement=True)
     company_name = Column(String(200), nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    version = row_version_column()
     
     # Relationship to bank accounts
     bank_accounts = relationship("CompanyBankAccount", back_populates="company", cascade="all, delete-orphan")
@@ -182,10 +188,15 @@ class CompanyBankAccount(Base):
     # branch_name = Column(String(150), nullable=True)
     
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    version = row_version_column()
     
     # Relationship to company
     company = relationship("Company", back_populates="bank_accounts")
 
+    __table_args__ = (
+        Index('ix_bank_account_company', 'company_id', 'id'),
+    )
+
 
 # --- Inflow Forms ---
 
@@ -218,9 +229,14 @@ class InflowForm(Base):
     attachment = Column(Integer, nullable=False, default=0)
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+    version = row_version_column()
 
     fields = relationship("InflowFormField", back_populates="inflow_form", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('ix_form_flow_type_mode_updated', 'flow_type', 'mode', 'updated_at'),
+    )
+
 
 class InflowFormField(Base):
     __tablename__ = "inflow_form_fields"
@@ -236,6 +252,7 @@ class InflowFormField(Base):
     sort_order = Column(Integer, default=0)
 
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    version = row_version_column()
 
     inflow_form = relationship("InflowForm", back_populates="fields")
 
@@ -256,13 +273,34 @@ class InflowEntryPayload(Base):
     mode = Column(String(50), nullable=True)
     bank_name = Column(String(150), nullable=True)
     bank_account_number = Column(String(150), nullable=True)
+    # Typed copies of payload values, filled at write time (see payload_fields.py)
+    amount = Column(DECIMAL(18, 2), nullable=True)
+    txn_date = Column(Date, nullable=True)
+    # TEXT / TEXTAREA payload values, FULLTEXT indexed for /api/flow-entries?q=
+    search_text = Column(Text, nullable=True)
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    version = row_version_column()
 
     # Relationships
     company = relationship("Company")
     inflow_form = relationship("InflowForm")
     attachments = relationship("InflowEntryAttachment", back_populates="inflow_entry", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('ix_entry_company_txn_date', 'company_id', 'txn_date', 'id'),
+        Index('ix_entry_company_amount', 'company_id', 'amount', 'id'),
+        Index('ix_entry_company_mode_created', 'company_id', 'mode', 'created_at', 'id'),
+        Index('ix_entry_company_created', 'company_id', 'created_at', 'id'),
+        Index('ix_entry_form_created', 'inflow_form_id', 'created_at', 'id'),
+        Index('ix_entry_search_text', 'search_text', mysql_prefix='FULLTEXT'),
+    )
+
+
+class AttachmentStatusEnum(str, enum.Enum):
+    PENDING = "PENDING"    # spooled to local disk, waiting for the upload worker
+    UPLOADED = "UPLOADED"
+    FAILED = "FAILED"      # gave up after ATTACHMENT_UPLOAD_MAX_ATTEMPTS; can be retried
+
 
 class InflowEntryAttachment(Base):
     __tablename__ = "inflow_entry_attachments"
@@ -270,9 +308,83 @@ class InflowEntryAttachment(Base):
     id = Column(BigInteger, primary_key=True, autoincrement=True)
     inflow_entry_id = Column(BigInteger, ForeignKey("inflow_entry_payloads.id", ondelete="CASCADE"), nullable=False)
     file_url = Column(Text, nullable=True)
+    # Object key in Railway Storage; readers sign a fresh URL from it (file_url is
+    # only kept for rows that predate keys or point outside our bucket)
+    storage_key = Column(String(500), nullable=True)
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    # Background upload state (see attachment_queue.py); file_url is set once UPLOADED
+    status = Column(
+        Enum(AttachmentStatusEnum, native_enum=False, length=20),
+        nullable=False, default=AttachmentStatusEnum.UPLOADED, server_default="UPLOADED"
+    )
+    file_name = Column(String(255), nullable=True)
+    spool_path = Column(String(500), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    # When the running upload attempt claimed the attachment (UTC); NULL when none holds it
+    claimed_at = Column(TIMESTAMP, nullable=True)
+    # SHA-256 of the spooled bytes, and the attachment_blobs row whose object it shares
+    content_sha256 = Column(String(64), nullable=True)
+    blob_id = Column(BigInteger, nullable=True)
+    # Keys of the downscaled JPEG renditions of image attachments (see image_renditions.py)
+    preview_key = Column(String(500), nullable=True)
+    thumbnail_key = Column(String(500), nullable=True)
 
     # Relationship
     inflow_entry = relationship("InflowEntryPayload", back_populates="attachments")
 
+    __table_args__ = (
+        Index('ix_attachment_entry', 'inflow_entry_id', 'id'),
+        Index('ix_attachment_status', 'status', 'id'),
+        Index('ix_attachment_blob', 'blob_id'),
+    )
+
+
+class AttachmentBlob(Base):
+    """Content-addressed attachment object shared by every attachment with the same bytes (see attachment_blobs.py)"""
+    __tablename__ = "attachment_blobs"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    company_id = Column(BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    storage_key = Column(String(500), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    # Attachments pointing at this blob; at 0 the object is kept, and reused by the next identical upload
+    ref_count = Column(Integer, nullable=False, default=0)
+    preview_key = Column(String(500), nullable=True)
+    thumbnail_key = Column(String(500), nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        UniqueConstraint('company_id', 'sha256', name='uk_blob_company_sha256'),
+    )
+
+
+class CashflowDailyRollup(Base):
+    """Per-day entry totals, maintained by the entry write endpoints (see rollup.py)"""
+    __tablename__ = "cashflow_daily_rollup"
+
+    company_id = Column(BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    inflow_form_id = Column(BigInteger, ForeignKey("inflow_forms.id", ondelete="CASCADE"), primary_key=True)
+    # Entry mode, '' when the entry has none (primary key columns cannot be NULL)
+    mode = Column(String(50), primary_key=True, default="")
+    # txn_date, or the created_at date for entries without one
+    day = Column(Date, primary_key=True)
+    total_amount = Column(DECIMAL(18, 2), nullable=False, default=0)
+    entry_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_rollup_company_day', 'company_id', 'day'),
+    )
+
+
+# --- Schema Migrations ---
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(200), nullable=False)
+    applied_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
 
@@ -0,0 +1,154 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, List, Optional, Tuple
+
+from dateutil import parser as date_parser
+
+# Payload keys checked first for the entry amount / transaction date, before
+# falling back to the first NUMBER / DATE field declared on the entry's form
+AMOUNT_KEYS = ("amount", "total_amount", "txn_amount", "transaction_amount")
+TXN_DATE_KEYS = ("txn_date", "transaction_date", "date", "receipt_date", "payment_date")
+
+# Field types whose values are copied into the entry's search_text column
+SEARCH_FIELD_TYPES = ("TEXT", "TEXTAREA")
+# search_text is a MySQL TEXT column (65,535 bytes, 4 per utf8mb4 character)
+SEARCH_TEXT_MAX_LENGTH = 16000
+
+# NUMBER fields are stored and exported as DECIMAL(18, 2), matching the money columns in models.py
+DECIMAL_PRECISION = 18
+DECIMAL_SCALE = 2
+_DECIMAL_QUANTUM = Decimal(1).scaleb(-DECIMAL_SCALE)
+_DECIMAL_LIMIT = Decimal(10) ** (DECIMAL_PRECISION - DECIMAL_SCALE)
+
+
+def coerce_value(column_type: str, raw):
+    """
+    Convert a raw payload value to the Python type of its field / export column type
+
+    Raises:
+        ValueError if the value cannot be converted
+    """
+    if raw is None or raw == "":
+        return None
+    if column_type == "NUMBER":
+        try:
+            value = Decimal(str(raw).replace(",", "").strip())
+        except InvalidOperation:
+            raise ValueError(f"Not a number: {raw!r}")
+        if not value.is_finite() or abs(value) >= _DECIMAL_LIMIT:
+            raise ValueError(f"Number out of range: {raw!r}")
+        return value.quantize(_DECIMAL_QUANTUM)
+    if column_type == "DATE":
+        if isinstance(raw, datetime):
+            return raw.date()
+        if isinstance(raw, date):
+            return raw
+        text = str(raw).strip()
+        try:
+            return date.fromisoformat(text[:10])
+        except ValueError:
+            pass
+        # Non-ISO dates from the app are entered day first (DD/MM/YYYY)
+        try:
+            return date_parser.parse(text, dayfirst=True).date()
+        except (ValueError, OverflowError):
+            raise ValueError(f"Not a date: {raw!r}")
+    if column_type in ("INTEGER", "TIMESTAMP"):
+        return raw
+    if isinstance(raw, (dict, list)):
+        return json.dumps(raw)
+    return str(raw)
+
+
+def _field_type(field) -> str:
+    return field.field_type.value if hasattr(field.field_type, "value") else field.field_type
+
+
+def _first_value(payload: dict, keys: Iterable[str], column_type: str):
+    for key in keys:
+        if key in payload:
+            try:
+                value = coerce_value(column_type, payload.get(key))
+            except ValueError:
+                continue
+            if value is not None:
+                return value
+    return None
+
+
+def extract_amount_and_txn_date(payload: Optional[dict], fields: Iterable = ()) -> Tuple:
+    """
+    Derive the typed amount and txn_date columns of an inflow entry from its payload
+
+    Args:
+        payload: Entry payload JSON
+        fields: InflowFormField objects of the entry's form (used as a fallback
+            when none of the well-known keys are present)
+
+    Returns:
+        (amount as Decimal or None, txn_date as date or None)
+    """
+    if not isinstance(payload, dict):
+        return None, None
+    fields = sorted(fields or [], key=lambda f: (f.sort_order or 0, f.id or 0))
+    amount = _first_value(payload, AMOUNT_KEYS, "NUMBER")
+    if amount is None:
+        amount = _first_value(payload, [f.field_key for f in fields if _field_type(f) == "NUMBER"], "NUMBER")
+    txn_date = _first_value(payload, TXN_DATE_KEYS, "DATE")
+    if txn_date is None:
+        txn_date = _first_value(payload, [f.field_key for f in fields if _field_type(f) == "DATE"], "DATE")
+    return amount, txn_date
+
+
+def build_search_text(payload: Optional[dict], fields: Iterable = ()) -> Optional[str]:
+    """
+    Build the full-text search column of an inflow entry from its payload
+
+    Args:
+        payload: Entry payload JSON
+        fields: InflowFormField objects of the entry's form; the values of its
+            TEXT and TEXTAREA fields are indexed, in sort order
+
+    Returns:
+        Space-separated field values, or None if there are none
+    """
+    if not isinstance(payload, dict):
+        return None
+    values = []
+    for field in sorted(fields or [], key=lambda f: (f.sort_order or 0, f.id or 0)):
+        if _field_type(field) not in SEARCH_FIELD_TYPES:
+            continue
+        value = payload.get(field.field_key)
+        if value is None or isinstance(value, (dict, list)):
+            continue
+        value = str(value).strip()
+        if value:
+            values.append(value)
+    return " ".join(values)[:SEARCH_TEXT_MAX_LENGTH] or None
+
+
+def validate_payload(payload: dict, fields: Iterable = ()) -> List[str]:
+    """
+    Check a payload against its form's fields
+
+    Required fields must have a non-empty value, and NUMBER / DATE values must
+    be convertible to their type. Keys not declared on the form are allowed.
+
+    Returns:
+        A list of error messages, empty if the payload is valid
+    """
+    errors = []
+    for field in fields or []:
+        value = payload.get(field.field_key)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            if field.is_required:
+                errors.append(f"{field.field_key} is required")
+            continue
+        field_type = _field_type(field)
+        if field_type in ("NUMBER", "DATE"):
+            try:
+                coerce_value(field_type, value)
+            except ValueError as e:
+                errors.append(f"{field.field_key}: {str(e)}")
+    return errors
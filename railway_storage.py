@@ -1,18 +1,27 @@
+import asyncio
 import os
-from typing import Optional
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List, Optional, Union
 import uuid
-from datetime import datetime
-from urllib.parse import quote
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from cache import TTLCache
 
 # Optional boto3 imports - handle gracefully if not installed
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
     from botocore.client import Config
     from botocore.exceptions import ClientError
     BOTO3_AVAILABLE = True
 except ImportError:
     BOTO3_AVAILABLE = False
     Config = None
+    TransferConfig = None
     print("Warning: boto3 not installed. Railway Storage uploads will be disabled.")
 
 # Railway Storage Configuration
@@ -36,6 +45,25 @@ RAILWAY_SECRET_ACCESS_KEY = os.getenv(
     "RAILWAY_SECRET_ACCESS_KEY",
     "tsec_PzM+nJh6gE1nmSyIvQk77iHnnBRd7iXzc5-zxLddRvfEgf96VDUB6tjYCScHyhkSHAbux1"
 )
+# Storage calls run in parallel per worker process for async handlers (see confirm_uploaded_files)
+RAILWAY_UPLOAD_CONCURRENCY = int(os.getenv("RAILWAY_UPLOAD_CONCURRENCY", "8"))
+# File objects larger than this are sent as an S3 multipart upload, one part of
+# RAILWAY_MULTIPART_CHUNK_SIZE bytes at a time (minimum part size is 5 MB)
+RAILWAY_MULTIPART_THRESHOLD = int(os.getenv("RAILWAY_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+RAILWAY_MULTIPART_CHUNK_SIZE = int(os.getenv("RAILWAY_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024)))
+# public-read ACL on uploaded objects: "auto" probes the bucket once per process,
+# "public-read" always sets it, "none" never does (buckets that reject ACLs)
+RAILWAY_STORAGE_ACL = os.getenv("RAILWAY_STORAGE_ACL", "auto").strip().lower()
+# Fraction of uploads (0..1) followed by a HEAD request to check the object landed
+RAILWAY_VERIFY_SAMPLE_RATE = float(os.getenv("RAILWAY_VERIFY_SAMPLE_RATE", "0"))
+# Lifetime of the GET URLs signed on read for stored object keys (Railway Storage
+# allows at most one week); signed_url_cache reuses a URL for half of it
+RAILWAY_SIGNED_URL_EXPIRES = int(os.getenv("RAILWAY_SIGNED_URL_EXPIRES", "604800"))
+SIGNED_URL_CACHE_MAX_ENTRIES = int(os.getenv("SIGNED_URL_CACHE_MAX_ENTRIES", "50000"))
+# Direct-to-bucket uploads: lifetime of the issued upload URL and, for POST
+# targets, the largest object the policy accepts
+RAILWAY_UPLOAD_URL_EXPIRES = int(os.getenv("RAILWAY_UPLOAD_URL_EXPIRES", "900"))
+RAILWAY_UPLOAD_MAX_BYTES = int(os.getenv("RAILWAY_UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
 
 # Initialize S3 client for Railway Storage
 _railway_s3_client = None
@@ -49,7 +77,10 @@ if BOTO3_AVAILABLE:
             signature_version='s3v4',
             s3={
                 'addressing_style': 'path'
-            }
+            },
+            # Enough pooled connections for the storage threads (this module's pool
+            # and the attachment upload workers) not to queue for one
+            max_pool_connections=max(10, RAILWAY_UPLOAD_CONCURRENCY + int(os.getenv("ATTACHMENT_UPLOAD_WORKERS", "4")))
         )
         
         # Create client - Railway Storage S3-compatible API
@@ -83,19 +114,138 @@ if BOTO3_AVAILABLE:
 else:
     _railway_init_error = "boto3 is not installed"
 
+# Parts are read and sent one after another, so a streamed upload holds at most
+# one chunk in memory; uploads of different files already run in parallel
+_transfer_config = TransferConfig(
+    multipart_threshold=RAILWAY_MULTIPART_THRESHOLD,
+    multipart_chunksize=RAILWAY_MULTIPART_CHUNK_SIZE,
+    use_threads=False
+) if BOTO3_AVAILABLE else None
+
+# Error codes from buckets that do not accept object ACLs
+_ACL_ERROR_CODES = ('InvalidArgument', 'NotImplemented', 'AccessDenied', 'AccessControlListNotSupported')
+
+# Result of the ACL probe for this process (None until probed)
+_acl_supported: Optional[bool] = None
+_acl_probe_lock = threading.Lock()
+
+
+def _error_code(error) -> str:
+    return error.response.get('Error', {}).get('Code', '')
 
-def upload_file_to_railway(file_content: bytes, file_name: str, folder: str = "attachments") -> Optional[str]:
+
+def _probe_acl_support() -> Optional[bool]:
     """
-    Upload a file to Railway Storage
+    Write a tiny object with ACL public-read and delete it again
+
+    Returns None if the probe failed for a reason unrelated to ACLs, so the
+    next upload probes again instead of caching a guess.
+    """
+    probe_key = f"_probe/acl-{uuid.uuid4().hex}"
+    try:
+        _railway_s3_client.put_object(Bucket=RAILWAY_STORAGE_BUCKET, Key=probe_key, Body=b"", ACL='public-read')
+        supported = True
+    except ClientError as e:
+        if _error_code(e) not in _ACL_ERROR_CODES:
+            print(f"⚠ Storage ACL probe failed, will retry on the next upload: {str(e)}")
+            return None
+        supported = False
+    try:
+        _railway_s3_client.delete_object(Bucket=RAILWAY_STORAGE_BUCKET, Key=probe_key)
+    except ClientError:
+        pass
+    print(f"✓ Storage ACL probe: public-read ACL {'supported' if supported else 'not supported'}")
+    return supported
+
+
+def storage_acl_supported() -> bool:
+    """
+    Whether uploads should set ACL public-read (RAILWAY_STORAGE_ACL, probed once when "auto")
+    """
+    global _acl_supported
+    if RAILWAY_STORAGE_ACL == "none":
+        return False
+    if RAILWAY_STORAGE_ACL == "public-read":
+        return True
+    if _acl_supported is None:
+        with _acl_probe_lock:
+            if _acl_supported is None:
+                _acl_supported = _probe_acl_support()
+    return bool(_acl_supported)
+
+
+def _put_file(storage_path: str, file_content: Union[bytes, BinaryIO], content_type: str, acl: Optional[str] = None):
+    """
+    Write one object: bytes with a single put_object, file objects streamed from
+    the start (multipart above RAILWAY_MULTIPART_THRESHOLD)
+    """
+    if isinstance(file_content, (bytes, bytearray)):
+        extra = {"ACL": acl} if acl else {}
+        _railway_s3_client.put_object(
+            Bucket=RAILWAY_STORAGE_BUCKET,
+            Key=storage_path,
+            Body=file_content,
+            ContentType=content_type,
+            **extra
+        )
+        return
+    extra_args = {"ContentType": content_type}
+    if acl:
+        extra_args["ACL"] = acl
+    file_content.seek(0)
+    _railway_s3_client.upload_fileobj(
+        file_content,
+        RAILWAY_STORAGE_BUCKET,
+        storage_path,
+        ExtraArgs=extra_args,
+        Config=_transfer_config
+    )
+
+
+def build_storage_path(file_name: str, folder: str = "attachments") -> str:
+    """
+    Unique object key for a file: folder/<timestamp>_<random><original extension>
+    """
+    file_extension = os.path.splitext(file_name)[1]
+    unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{file_extension}"
+    return f"{folder}/{unique_filename}" if folder else unique_filename
+
+
+def content_type_for(file_name: str) -> str:
+    """
+    Content type stored with an object, based on the file extension
+    """
+    file_extension = os.path.splitext(file_name)[1].lower()
+    if file_extension in ['.jpg', '.jpeg']:
+        return 'image/jpeg'
+    if file_extension == '.png':
+        return 'image/png'
+    if file_extension == '.pdf':
+        return 'application/pdf'
+    if file_extension in ['.doc', '.docx']:
+        return 'application/msword'
+    if file_extension == '.txt':
+        return 'text/plain'
+    return 'application/octet-stream'
+
+
+def put_file_to_railway(file_content: Union[bytes, BinaryIO], file_name: str, folder: str = "attachments",
+                        storage_path: Optional[str] = None) -> str:
+    """
+    Upload a file to Railway Storage and return its object key
     
     Args:
-        file_content: Bytes content of the file
+        file_content: Bytes content of the file, or a binary file object (e.g. an
+            UploadFile's spooled .file) to stream without reading it into memory
         file_name: Original file name
         folder: Folder path in Railway Storage bucket
+        storage_path: Object key to write instead of a new unique key in folder
+            (e.g. a content-addressed key)
         
     Returns:
-        Public URL of the uploaded file or None if upload fails
+        Object key of the uploaded file (store it and sign URLs on read, see signed_url_for_key)
     """
+    global _acl_supported
     if not BOTO3_AVAILABLE:
         error_msg = "boto3 is not installed. Please install it using: pip install boto3"
         print(f"Error: {error_msg}")
@@ -107,113 +257,31 @@ def upload_file_to_railway(file_content: bytes, file_name: str, folder: str = "a
         raise Exception(error_msg)
     
     try:
-        # Generate unique filename with timestamp and UUID
-        file_extension = os.path.splitext(file_name)[1]
-        unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{file_extension}"
-        
-        # Create storage path
-        storage_path = f"{folder}/{unique_filename}" if folder else unique_filename
-        
-        # Determine content type based on file extension
-        content_type = 'application/octet-stream'
-        if file_extension.lower() in ['.jpg', '.jpeg']:
-            content_type = 'image/jpeg'
-        elif file_extension.lower() == '.png':
-            content_type = 'image/png'
-        elif file_extension.lower() == '.pdf':
-            content_type = 'application/pdf'
-        elif file_extension.lower() in ['.doc', '.docx']:
-            content_type = 'application/msword'
-        elif file_extension.lower() == '.txt':
-            content_type = 'text/plain'
+        storage_path = storage_path or build_storage_path(file_name, folder)
+        content_type = content_type_for(file_name)
         
-        # Upload file to Railway Storage
-        # Try to upload with public-read ACL first
-        acl_success = False
+        # Upload file to Railway Storage: one PUT, with the ACL only if the bucket takes it
+        acl = 'public-read' if storage_acl_supported() else None
         try:
-            _railway_s3_client.put_object(
-                Bucket=RAILWAY_STORAGE_BUCKET,
-                Key=storage_path,
-                Body=file_content,
-                ContentType=content_type,
-                ACL='public-read'  # Try with ACL first
-            )
-            acl_success = True
-            print(f"✓ File uploaded with public-read ACL")
+            _put_file(storage_path, file_content, content_type, acl=acl)
         except ClientError as acl_error:
-            # If ACL fails, try without ACL
-            error_code = acl_error.response.get('Error', {}).get('Code', '')
-            if error_code in ['InvalidArgument', 'NotImplemented', 'AccessDenied', 'AccessControlListNotSupported']:
-                print(f"ACL not supported in put_object, uploading without ACL: {str(acl_error)}")
-                _railway_s3_client.put_object(
-                    Bucket=RAILWAY_STORAGE_BUCKET,
-                    Key=storage_path,
-                    Body=file_content,
-                    ContentType=content_type
-                )
-                # Try to set ACL after upload
-                try:
-                    _railway_s3_client.put_object_acl(
-                        Bucket=RAILWAY_STORAGE_BUCKET,
-                        Key=storage_path,
-                        ACL='public-read'
-                    )
-                    acl_success = True
-                    print(f"✓ File uploaded and ACL set to public-read after upload")
-                except ClientError as acl_error2:
-                    print(f"⚠ Could not set ACL to public-read: {str(acl_error2)}")
-                    # Continue - will generate presigned URL instead
+            # Bucket stopped accepting ACLs since the probe: remember that and upload once more without
+            if acl and RAILWAY_STORAGE_ACL == "auto" and _error_code(acl_error) in _ACL_ERROR_CODES:
+                print(f"⚠ ACL rejected, uploading without ACL from now on: {str(acl_error)}")
+                _acl_supported = False
+                _put_file(storage_path, file_content, content_type)
             else:
                 raise
         
-        # Verify the upload was successful by checking if object exists
-        try:
-            _railway_s3_client.head_object(Bucket=RAILWAY_STORAGE_BUCKET, Key=storage_path)
-            print(f"✓ File verified in Railway Storage")
-        except ClientError as verify_error:
-            print(f"Warning: Upload completed but verification failed: {str(verify_error)}")
-            # Still return URL as upload might have succeeded
+        # Optionally check a sample of uploads landed (the PUT already succeeded)
+        if RAILWAY_VERIFY_SAMPLE_RATE > 0 and random.random() < RAILWAY_VERIFY_SAMPLE_RATE:
+            try:
+                _railway_s3_client.head_object(Bucket=RAILWAY_STORAGE_BUCKET, Key=storage_path)
+                print(f"✓ File verified in Railway Storage")
+            except ClientError as verify_error:
+                print(f"Warning: Upload completed but verification failed: {str(verify_error)}")
         
-        # Construct URL - Railway Storage requires presigned URLs for access
-        encoded_path = quote(storage_path, safe='/')
-        
-        # Generate presigned URL for reliable access (valid for 1 year)
-        # Railway Storage buckets are private by default, presigned URLs are required
-        print(f"🔍 Generating presigned URL for: {storage_path}")
-        try:
-            # Generate presigned URL - this is the ONLY way to access files in private Railway Storage buckets
-            # Railway Storage limit: presigned URLs can only be valid for max 1 week (604800 seconds)
-            presigned_url = _railway_s3_client.generate_presigned_url(
-                ClientMethod='get_object',
-                Params={
-                    'Bucket': RAILWAY_STORAGE_BUCKET,
-                    'Key': storage_path
-                },
-                ExpiresIn=604800  # 1 week (604800 seconds = 7 days) - Railway Storage maximum
-            )
-            
-            if presigned_url and len(presigned_url) > 0 and presigned_url.startswith('http'):
-                print(f"✓ Successfully generated presigned URL (valid for 1 week - Railway Storage maximum)")
-                print(f"  URL preview: {presigned_url[:80]}...")
-                return presigned_url
-            else:
-                raise Exception(f"Invalid presigned URL format: {presigned_url[:50] if presigned_url else 'None'}")
-                
-        except ClientError as presign_error:
-            error_code = presign_error.response.get('Error', {}).get('Code', 'Unknown')
-            error_msg = presign_error.response.get('Error', {}).get('Message', str(presign_error))
-            print(f"✗ Failed to generate presigned URL")
-            print(f"  Error Code: {error_code}")
-            print(f"  Error Message: {error_msg}")
-            print(f"  Full error: {presign_error}")
-            # Don't fallback to public URL - it won't work
-            raise Exception(f"Cannot generate accessible URL. Railway Storage error [{error_code}]: {error_msg}. Presigned URLs are required for private buckets.")
-            
-        except Exception as presign_error:
-            print(f"✗ Unexpected error generating presigned URL: {str(presign_error)}")
-            import traceback
-            traceback.print_exc()
-            raise Exception(f"Failed to generate presigned URL: {str(presign_error)}")
+        return storage_path
     except ClientError as e:
         error_code = e.response.get('Error', {}).get('Code', 'Unknown')
         error_message = e.response.get('Error', {}).get('Message', str(e))
@@ -226,6 +294,286 @@ def upload_file_to_railway(file_content: bytes, file_name: str, folder: str = "a
         raise Exception(error_detail) from e
 
 
+
+
+def upload_file_to_railway(file_content: Union[bytes, BinaryIO], file_name: str, folder: str = "attachments") -> Optional[str]:
+    """
+    Upload a file to Railway Storage
+    
+    Args:
+        file_content: Bytes content of the file, or a binary file object (e.g. an
+            UploadFile's spooled .file) to stream without reading it into memory
+        file_name: Original file name
+        folder: Folder path in Railway Storage bucket
+        
+    Returns:
+        Presigned URL of the uploaded file, valid for 1 week. Prefer put_file_to_railway
+        for anything stored: the URL stops working when it expires, the key does not.
+    """
+    storage_path = put_file_to_railway(file_content, file_name, folder)
+    
+    # Generate presigned URL for reliable access (valid for 1 year)
+    # Railway Storage buckets are private by default, presigned URLs are required
+    print(f"🔍 Generating presigned URL for: {storage_path}")
+    try:
+        # Generate presigned URL - this is the ONLY way to access files in private Railway Storage buckets
+        # Railway Storage limit: presigned URLs can only be valid for max 1 week (604800 seconds)
+        presigned_url = _railway_s3_client.generate_presigned_url(
+            ClientMethod='get_object',
+            Params={
+                'Bucket': RAILWAY_STORAGE_BUCKET,
+                'Key': storage_path
+            },
+            ExpiresIn=604800  # 1 week (604800 seconds = 7 days) - Railway Storage maximum
+        )
+        
+        if presigned_url and len(presigned_url) > 0 and presigned_url.startswith('http'):
+            print(f"✓ Successfully generated presigned URL (valid for 1 week - Railway Storage maximum)")
+            print(f"  URL preview: {presigned_url[:80]}...")
+            return presigned_url
+        else:
+            raise Exception(f"Invalid presigned URL format: {presigned_url[:50] if presigned_url else 'None'}")
+            
+    except ClientError as presign_error:
+        error_code = presign_error.response.get('Error', {}).get('Code', 'Unknown')
+        error_msg = presign_error.response.get('Error', {}).get('Message', str(presign_error))
+        print(f"✗ Failed to generate presigned URL")
+        print(f"  Error Code: {error_code}")
+        print(f"  Error Message: {error_msg}")
+        print(f"  Full error: {presign_error}")
+        # Don't fallback to public URL - it won't work
+        raise Exception(f"Cannot generate accessible URL. Railway Storage error [{error_code}]: {error_msg}. Presigned URLs are required for private buckets.")
+        
+    except Exception as presign_error:
+        print(f"✗ Unexpected error generating presigned URL: {str(presign_error)}")
+        import traceback
+        traceback.print_exc()
+        raise Exception(f"Failed to generate presigned URL: {str(presign_error)}")
+
+
+# boto3 is blocking, so storage calls made for async handlers run on their own
+# bounded pool rather than on the event loop (or the default executor shared
+# with sync route handlers)
+_upload_executor = ThreadPoolExecutor(
+    max_workers=RAILWAY_UPLOAD_CONCURRENCY,
+    thread_name_prefix="railway-upload"
+)
+
+
+def generate_presigned_upload(file_name: str, folder: str, method: str = "PUT", content_type: Optional[str] = None) -> dict:
+    """
+    Issue a presigned target for a client to upload one file straight to Railway Storage
+    
+    Args:
+        file_name: Original file name (only its extension is kept in the key)
+        folder: Folder the object key is created under
+        method: "PUT" (upload the raw bytes to url) or "POST" (multipart form to
+            url with the returned fields, size limited to RAILWAY_UPLOAD_MAX_BYTES)
+        content_type: Content type the client will send (defaults from the extension)
+        
+    Returns:
+        { "key", "method", "url", "fields", "headers", "expires_in" }; the client
+        must send the returned headers (PUT) or fields (POST) unchanged
+    """
+    if not _railway_s3_client:
+        raise Exception(f"Railway Storage S3 client not initialized. {_railway_init_error or ''}".strip())
+    
+    storage_path = build_storage_path(file_name, folder)
+    content_type = content_type or content_type_for(file_name)
+    if method == "POST":
+        post = _railway_s3_client.generate_presigned_post(
+            Bucket=RAILWAY_STORAGE_BUCKET,
+            Key=storage_path,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, RAILWAY_UPLOAD_MAX_BYTES],
+            ],
+            ExpiresIn=RAILWAY_UPLOAD_URL_EXPIRES
+        )
+        url, fields, headers = post["url"], post["fields"], {}
+    else:
+        url = _railway_s3_client.generate_presigned_url(
+            ClientMethod='put_object',
+            Params={
+                'Bucket': RAILWAY_STORAGE_BUCKET,
+                'Key': storage_path,
+                'ContentType': content_type
+            },
+            ExpiresIn=RAILWAY_UPLOAD_URL_EXPIRES
+        )
+        fields, headers = {}, {"Content-Type": content_type}
+    return {
+        "key": storage_path,
+        "method": method,
+        "url": url,
+        "fields": fields,
+        "headers": headers,
+        "expires_in": RAILWAY_UPLOAD_URL_EXPIRES,
+    }
+
+
+def get_object_info(storage_path: str) -> Optional[dict]:
+    """
+    Size and content type of an object, or None if it does not exist
+    
+    Raises for any other storage error, so callers can tell "missing" from "unreachable".
+    """
+    if not _railway_s3_client:
+        raise Exception(f"Railway Storage S3 client not initialized. {_railway_init_error or ''}".strip())
+    try:
+        head = _railway_s3_client.head_object(Bucket=RAILWAY_STORAGE_BUCKET, Key=storage_path)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+    return {"size": head.get("ContentLength"), "content_type": head.get("ContentType")}
+
+
+def is_storage_key_in_folder(storage_path: str, folder: str) -> bool:
+    """
+    True if storage_path is an object key directly inside folder (no traversal)
+    """
+    prefix = f"{folder}/"
+    if not storage_path.startswith(prefix):
+        return False
+    name = storage_path[len(prefix):]
+    return bool(name) and "/" not in name and name not in (".", "..")
+
+
+def storage_key_from_url(file_url: str, *folders: str) -> Optional[str]:
+    """
+    Object key of a URL into our bucket, if the key is directly inside one of folders
+
+    Only path-style URLs on RAILWAY_STORAGE_ENDPOINT's host count. Anything else
+    (another host, a key outside folders) gives None, so a client-supplied URL
+    can never make us sign another company's object.
+    """
+    parts = urlsplit(file_url)
+    if not parts.netloc or parts.netloc.lower() != urlsplit(RAILWAY_STORAGE_ENDPOINT).netloc.lower():
+        return None
+    prefix = f"/{RAILWAY_STORAGE_BUCKET}/"
+    if not parts.path.startswith(prefix):
+        return None
+    storage_path = unquote(parts.path[len(prefix):])
+    if any(is_storage_key_in_folder(storage_path, folder) for folder in folders):
+        return storage_path
+    return None
+
+
+def confirm_uploaded_file(storage_path: str, folder: str):
+    """
+    Check that a directly uploaded object exists under folder
+    
+    Raises:
+        ValueError: the key is outside folder, the object does not exist or is empty
+    """
+    if not is_storage_key_in_folder(storage_path, folder):
+        raise ValueError(f"Key must be under {folder}/")
+    info = get_object_info(storage_path)
+    if info is None:
+        raise ValueError("Object not found; upload it before confirming")
+    if not info["size"]:
+        raise ValueError("Object is empty")
+
+
+async def confirm_uploaded_files(keys: List[str], folder: str) -> List[Optional[str]]:
+    """
+    confirm_uploaded_file for several keys concurrently, on the upload pool
+    
+    Returns:
+        One error message per key (None if confirmed), in the order given
+    """
+    loop = asyncio.get_running_loop()
+    
+    async def _confirm(storage_path: str):
+        try:
+            await loop.run_in_executor(_upload_executor, confirm_uploaded_file, storage_path, folder)
+            return None
+        except Exception as e:
+            return str(e)
+    
+    return await asyncio.gather(*(_confirm(key) for key in keys))
+
+
+signed_url_cache = TTLCache(RAILWAY_SIGNED_URL_EXPIRES // 2, SIGNED_URL_CACHE_MAX_ENTRIES)
+
+
+def signed_url_for_key(storage_path: str) -> Optional[str]:
+    """
+    Presigned GET URL for a stored object key, signed at most once per half URL
+    lifetime (see signed_url_cache) so every URL handed out has at least
+    RAILWAY_SIGNED_URL_EXPIRES / 2 seconds left
+
+    Returns None if storage is not configured or signing fails.
+    """
+    cached = signed_url_cache.get(storage_path)
+    if cached is not None:
+        return cached
+    if not _railway_s3_client:
+        return None
+    generation = signed_url_cache.generation
+    try:
+        presigned_url = _railway_s3_client.generate_presigned_url(
+            ClientMethod='get_object',
+            Params={
+                'Bucket': RAILWAY_STORAGE_BUCKET,
+                'Key': storage_path
+            },
+            ExpiresIn=RAILWAY_SIGNED_URL_EXPIRES
+        )
+    except Exception as e:
+        print(f"✗ Failed to sign URL for {storage_path}: {str(e)}")
+        return None
+    signed_url_cache.set(storage_path, presigned_url, generation)
+    return presigned_url
+
+
+def signed_url_epoch() -> int:
+    """
+    Index of the current half-URL-lifetime window
+
+    Responses that embed signed URLs put it in their ETag: a response fetched in
+    this window only holds URLs valid past its end, so a 304 is safe until it changes.
+    """
+    return int(time.time() // (RAILWAY_SIGNED_URL_EXPIRES // 2))
+
+
+def presign_get_urls(storage_paths: List[str], expires_in: int = RAILWAY_SIGNED_URL_EXPIRES) -> List[str]:
+    """
+    Sign GET URLs for many keys in one loop on the shared client (signing is
+    local, no request is made per key)
+    """
+    if not _railway_s3_client:
+        raise Exception(f"Railway Storage S3 client not initialized. {_railway_init_error or ''}".strip())
+    return [
+        _railway_s3_client.generate_presigned_url(
+            ClientMethod='get_object',
+            Params={'Bucket': RAILWAY_STORAGE_BUCKET, 'Key': storage_path},
+            ExpiresIn=expires_in
+        )
+        for storage_path in storage_paths
+    ]
+
+
+def presigned_url_expires_at(file_url: str) -> Optional[datetime]:
+    """
+    Expiry (UTC) encoded in a presigned URL's query string, or None if it is not one
+
+    Understands SigV4 (X-Amz-Date + X-Amz-Expires) and SigV2 (Expires) URLs.
+    """
+    try:
+        query = parse_qs(urlsplit(file_url).query)
+        if "X-Amz-Date" in query and "X-Amz-Expires" in query:
+            signed_at = datetime.strptime(query["X-Amz-Date"][0], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+            return signed_at + timedelta(seconds=int(query["X-Amz-Expires"][0]))
+        if "Expires" in query:
+            return datetime.fromtimestamp(int(query["Expires"][0]), tz=timezone.utc)
+    except (ValueError, OverflowError):
+        pass
+    return None
+
+
 def generate_presigned_url_from_path(storage_path: str) -> Optional[str]:
     """
     Generate a presigned URL for an existing file in Railway Storage
@@ -270,12 +618,13 @@ def generate_presigned_url_from_path(storage_path: str) -> Optional[str]:
         return None
 
 
-def extract_storage_path_from_url(file_url: str) -> Optional[str]:
+def extract_storage_path_from_url(file_url: str, verbose: bool = True) -> Optional[str]:
     """
     Extract storage path from Railway Storage URL
     
     Args:
         file_url: Full URL or presigned URL from Railway Storage
+        verbose: Log each extraction (turn off for batch conversions)
         
     Returns:
         Storage path (e.g., "inflow/1/1/file.png") or None if extraction fails
@@ -292,7 +641,8 @@ def extract_storage_path_from_url(file_url: str) -> Optional[str]:
             # URL decode the path
             from urllib.parse import unquote
             decoded_path = unquote(path)
-            print(f"✓ Extracted storage path: {decoded_path}")
+            if verbose:
+                print(f"✓ Extracted storage path: {decoded_path}")
             return decoded_path
         
         # If URL doesn't match expected format, try to extract from common patterns
@@ -305,10 +655,12 @@ def extract_storage_path_from_url(file_url: str) -> Optional[str]:
                     path = "/".join(parts[bucket_index + 1:])
                     from urllib.parse import unquote
                     decoded_path = unquote(path)
-                    print(f"✓ Extracted storage path (alternative method): {decoded_path}")
+                    if verbose:
+                        print(f"✓ Extracted storage path (alternative method): {decoded_path}")
                     return decoded_path
         
-        print(f"⚠ Could not extract storage path from URL: {file_url}")
+        if verbose:
+            print(f"⚠ Could not extract storage path from URL: {file_url}")
         return None
         
     except Exception as e:
@@ -0,0 +1,93 @@
+"""
+Recompute cashflow_daily_rollup from inflow_entry_payloads
+
+Deletes the rollup rows in scope, then aggregates entries in primary-key
+chunks, one INSERT ... SELECT ... GROUP BY per chunk and one transaction each.
+The table is created by migration 0004; run `python migrate.py` first.
+
+Entries written while a rebuild is running can be counted twice, so run it
+with writes paused (e.g. during the release, before the new workers start).
+
+Usage:
+    python rebuild_daily_rollup.py [--batch-size 10000] [--company-id N]
+"""
+import argparse
+import time
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+
+from database import SessionLocal
+from models import CashflowDailyRollup, InflowEntryPayload
+from rollup import ROLLUP_DAY, ROLLUP_MODE, upsert_rollup_from_select
+
+
+def rebuild(batch_size: int, company_id: Optional[int] = None):
+    db = SessionLocal()
+    try:
+        scope = []
+        if company_id is not None:
+            scope.append(InflowEntryPayload.company_id == company_id)
+
+        cleared = delete(CashflowDailyRollup)
+        if company_id is not None:
+            cleared = cleared.where(CashflowDailyRollup.company_id == company_id)
+        db.execute(cleared)
+        db.commit()
+
+        last_id = 0
+        scanned = 0
+        started = time.monotonic()
+        while True:
+            # Upper id of the next chunk of batch_size entries
+            upper_id = db.execute(
+                select(InflowEntryPayload.id)
+                .where(InflowEntryPayload.id > last_id, *scope)
+                .order_by(InflowEntryPayload.id)
+                .offset(batch_size - 1)
+                .limit(1)
+            ).scalar()
+            if upper_id is None:
+                upper_id = db.execute(
+                    select(func.max(InflowEntryPayload.id)).where(InflowEntryPayload.id > last_id, *scope)
+                ).scalar()
+                if upper_id is None:
+                    break
+
+            in_chunk = [InflowEntryPayload.id > last_id, InflowEntryPayload.id <= upper_id, *scope]
+            source = (
+                select(
+                    InflowEntryPayload.company_id,
+                    InflowEntryPayload.inflow_form_id,
+                    ROLLUP_MODE,
+                    ROLLUP_DAY,
+                    func.coalesce(func.sum(InflowEntryPayload.amount), 0),
+                    func.count(InflowEntryPayload.id),
+                )
+                .where(*in_chunk)
+                .group_by(InflowEntryPayload.company_id, InflowEntryPayload.inflow_form_id, ROLLUP_MODE, ROLLUP_DAY)
+            )
+            upsert_rollup_from_select(db, source)
+            scanned += db.execute(select(func.count(InflowEntryPayload.id)).where(*in_chunk)).scalar()
+            db.commit()
+
+            last_id = upper_id
+            elapsed = time.monotonic() - started
+            print(f"✓ Up to id {last_id}: {scanned} entries rolled up ({scanned / elapsed:.0f} rows/s)")
+
+        rollup_rows = db.query(func.count()).select_from(CashflowDailyRollup).scalar()
+        print(f"Rebuild complete: {scanned} entries, {rollup_rows} rollup rows")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Rebuild the cashflow daily rollup table")
+    arg_parser.add_argument("--batch-size", type=int, default=10000, help="Entries per chunk (one transaction each)")
+    arg_parser.add_argument("--company-id", type=int, default=None, help="Only rebuild this company's rows")
+    args = arg_parser.parse_args()
+
+    rebuild(args.batch_size, args.company_id)
@@ -0,0 +1,106 @@
+"""
+Reconcile the mode / bank_name / bank_account_number columns of inflow_entry_payloads with payload JSON
+
+/api/flow-entries filters on these columns, so rows where a column and the
+matching payload key disagree would be missed or wrongly returned. For each
+such row:
+  - column empty, payload set: the payload value is copied into the column
+  - both set but different: the column wins (edits used to update the column
+    without persisting the payload) and is written back into the payload
+
+Walks the table in primary-key order, one chunk per transaction. The listing
+index on mode is added by migration 0002; run `python migrate.py` first.
+
+Usage:
+    python reconcile_entry_columns.py [--batch-size 1000] [--start-after-id N] [--dry-run]
+"""
+import argparse
+import time
+
+from sqlalchemy import select, update
+
+from database import SessionLocal
+from models import InflowEntryPayload
+
+RECONCILED_KEYS = ("mode", "bank_name", "bank_account_number")
+
+
+def reconcile_row(row):
+    """
+    Return the changes needed to make a row consistent, or None if it already is
+    """
+    payload = dict(row.payload) if isinstance(row.payload, dict) else None
+    changes = {}
+    payload_changed = False
+    for key in RECONCILED_KEYS:
+        column_value = getattr(row, key)
+        payload_value = payload.get(key) if payload is not None else None
+        if payload_value is not None and not isinstance(payload_value, str):
+            payload_value = str(payload_value)
+        if not column_value and payload_value:
+            changes[key] = payload_value.strip()
+        elif column_value and payload is not None and payload_value != column_value:
+            payload[key] = column_value
+            payload_changed = True
+    if payload_changed:
+        changes["payload"] = payload
+    if not changes:
+        return None
+    changes["id"] = row.id
+    return changes
+
+
+def reconcile(batch_size: int, start_after_id: int, dry_run: bool):
+    db = SessionLocal()
+    try:
+        last_id = start_after_id
+        scanned = 0
+        fixed = 0
+        started = time.monotonic()
+        while True:
+            rows = db.execute(
+                select(
+                    InflowEntryPayload.id,
+                    InflowEntryPayload.payload,
+                    InflowEntryPayload.mode,
+                    InflowEntryPayload.bank_name,
+                    InflowEntryPayload.bank_account_number,
+                )
+                .where(InflowEntryPayload.id > last_id)
+                .order_by(InflowEntryPayload.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            changes = [c for c in (reconcile_row(row) for row in rows) if c is not None]
+            if changes and not dry_run:
+                # Group by the set of changed columns so each executemany has a uniform shape
+                by_shape = {}
+                for change in changes:
+                    by_shape.setdefault(tuple(sorted(change)), []).append(change)
+                for group in by_shape.values():
+                    db.execute(update(InflowEntryPayload), group)
+                db.commit()
+
+            last_id = rows[-1].id
+            scanned += len(rows)
+            fixed += len(changes)
+            elapsed = time.monotonic() - started
+            print(f"✓ Up to id {last_id}: scanned {scanned}, {'would fix' if dry_run else 'fixed'} {fixed} ({scanned / elapsed:.0f} rows/s)")
+        print(f"Reconciliation complete: scanned {scanned}, {'would fix' if dry_run else 'fixed'} {fixed}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Reconcile inflow entry mode / bank columns with payload JSON")
+    arg_parser.add_argument("--batch-size", type=int, default=1000, help="Rows per chunk (one transaction each)")
+    arg_parser.add_argument("--start-after-id", type=int, default=0, help="Resume after this id")
+    arg_parser.add_argument("--dry-run", action="store_true", help="Report rows that would change without writing")
+    args = arg_parser.parse_args()
+
+    reconcile(args.batch_size, args.start_after_id, args.dry_run)
@@ -0,0 +1,229 @@
+"""
+Re-sign the presigned URLs stored in inflow_entry_attachments.file_url
+
+Walks attachments with a file_url in primary-key order, one chunk per transaction.
+Each chunk's expired (or soon to expire) URLs are re-signed in one loop on the
+shared S3 client and written back with one bulk UPDATE; rows without a
+storage_key get the key from their URL at the same time (only keys inside the
+attachment's own entry folders are ever signed). The last
+processed id is recorded in a checkpoint file so an interrupted run resumes where
+it stopped; the checkpoint is removed after a complete pass so the next run
+starts from the beginning again.
+
+The API signs attachment URLs from storage_key when it returns them, so this only
+matters for anything that reads file_url straight from the database. Other URLs
+are left as they are.
+
+Also started from the API with POST /api/admin/refresh-attachment-urls. A MySQL
+named lock lets only one run (CLI or any API worker) go at a time.
+
+Usage:
+    python refresh_attachment_urls.py [--batch-size 1000] [--min-remaining-hours 24] [--all]
+                                      [--start-after-id N] [--checkpoint-file PATH]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, text, update
+
+from attachment_blobs import entry_storage_folders
+from backfill_entry_columns import clear_checkpoint, read_checkpoint, write_checkpoint
+from database import SessionLocal, engine
+from models import InflowEntryAttachment, InflowEntryPayload
+from railway_storage import (
+    RAILWAY_SIGNED_URL_EXPIRES, is_storage_key_in_folder, presign_get_urls, presigned_url_expires_at,
+    storage_key_from_url
+)
+
+DEFAULT_CHECKPOINT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".refresh_attachment_urls.checkpoint")
+
+# Progress of the run started from the API (one per process)
+refresh_progress = {"running": False}
+_refresh_lock = threading.Lock()
+
+# MySQL named lock held for a whole run, across processes (see migrate.py)
+_LOCK_NAME = "cashflow_refresh_attachment_urls"
+
+
+def acquire_run_lock():
+    """
+    Connection holding the run lock, or None if another run holds it
+
+    Pass it to release_run_lock when the run ends.
+    """
+    conn = engine.connect()
+    if conn.dialect.name != "mysql":
+        return conn
+    try:
+        got_lock = conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": _LOCK_NAME}).scalar()
+        conn.commit()
+    except Exception:
+        conn.close()
+        raise
+    if got_lock != 1:
+        conn.close()
+        return None
+    return conn
+
+
+def release_run_lock(conn):
+    try:
+        if conn.dialect.name == "mysql":
+            # Named locks belong to the connection, which goes back to the pool
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": _LOCK_NAME})
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def refresh_urls(batch_size: int, start_after_id: int, checkpoint_file: str,
+                 min_remaining: Optional[timedelta] = timedelta(hours=24), progress: Optional[dict] = None):
+    """
+    Re-sign stored URLs that expire within min_remaining (every URL if None)
+
+    progress, if given, is updated after each chunk.
+    """
+    progress = progress if progress is not None else {}
+    db = SessionLocal()
+    try:
+        last_id = start_after_id
+        scanned = 0
+        refreshed = 0
+        started = time.monotonic()
+        while True:
+            rows = db.execute(
+                select(
+                    InflowEntryAttachment.id,
+                    InflowEntryAttachment.file_url,
+                    InflowEntryAttachment.storage_key,
+                    InflowEntryPayload.company_id,
+                    InflowEntryPayload.inflow_form_id,
+                )
+                .join(InflowEntryPayload, InflowEntryPayload.id == InflowEntryAttachment.inflow_entry_id)
+                .where(
+                    InflowEntryAttachment.id > last_id,
+                    InflowEntryAttachment.file_url.isnot(None),
+                )
+                .order_by(InflowEntryAttachment.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            refresh_before = datetime.now(timezone.utc) + min_remaining if min_remaining is not None else None
+            stale = []
+            for row in rows:
+                if refresh_before is not None:
+                    expires_at = presigned_url_expires_at(row.file_url)
+                    if expires_at is not None and expires_at > refresh_before:
+                        continue
+                # Only keys inside the attachment's own entry folders are signed
+                folders = entry_storage_folders(row.company_id, row.inflow_form_id)
+                storage_key = row.storage_key
+                if not storage_key or not any(is_storage_key_in_folder(storage_key, folder) for folder in folders):
+                    storage_key = storage_key_from_url(row.file_url, *folders)
+                if storage_key:
+                    stale.append((row.id, storage_key))
+            if stale:
+                urls = presign_get_urls([key for _, key in stale], RAILWAY_SIGNED_URL_EXPIRES)
+                db.execute(
+                    update(InflowEntryAttachment),
+                    [
+                        {"id": attachment_id, "storage_key": key, "file_url": url}
+                        for (attachment_id, key), url in zip(stale, urls)
+                    ]
+                )
+            db.commit()
+
+            last_id = rows[-1].id
+            scanned += len(rows)
+            refreshed += len(stale)
+            write_checkpoint(checkpoint_file, last_id)
+            elapsed = time.monotonic() - started
+            rate = scanned / elapsed if elapsed else 0.0
+            progress.update(last_id=last_id, scanned=scanned, refreshed=refreshed, rows_per_second=round(rate))
+            print(f"✓ Up to id {last_id}: scanned {scanned}, refreshed {refreshed} ({rate:.0f} rows/s)")
+
+        clear_checkpoint(checkpoint_file)
+        progress.update(scanned=scanned, refreshed=refreshed)
+        print(f"URL refresh complete: scanned {scanned}, refreshed {refreshed}, left as stored {scanned - refreshed}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _run_in_background(lock_conn, batch_size: int, min_remaining: Optional[timedelta]):
+    try:
+        refresh_urls(
+            batch_size, read_checkpoint(DEFAULT_CHECKPOINT_FILE), DEFAULT_CHECKPOINT_FILE,
+            min_remaining=min_remaining, progress=refresh_progress
+        )
+    except Exception as e:
+        refresh_progress["error"] = str(e)
+        print(f"✗ Attachment URL refresh failed: {str(e)}")
+    finally:
+        release_run_lock(lock_conn)
+        refresh_progress["running"] = False
+        refresh_progress["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+
+def start_refresh(batch_size: int, min_remaining: Optional[timedelta]) -> bool:
+    """
+    Start a refresh run on a background thread, resuming from the checkpoint
+
+    Returns False if a run is already in progress, here or in another process.
+    """
+    with _refresh_lock:
+        if refresh_progress["running"]:
+            return False
+        lock_conn = acquire_run_lock()
+        if lock_conn is None:
+            return False
+        refresh_progress.clear()
+        refresh_progress.update(
+            running=True,
+            started_at=datetime.now(timezone.utc).isoformat(),
+            start_after_id=read_checkpoint(DEFAULT_CHECKPOINT_FILE),
+            last_id=None,
+            scanned=0,
+            refreshed=0,
+            rows_per_second=0,
+        )
+    threading.Thread(
+        target=_run_in_background, args=(lock_conn, batch_size, min_remaining),
+        name="attachment-url-refresh", daemon=True
+    ).start()
+    return True
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Re-sign expired presigned URLs stored on attachments")
+    arg_parser.add_argument("--batch-size", type=int, default=1000, help="Rows per chunk (one transaction each)")
+    arg_parser.add_argument("--min-remaining-hours", type=float, default=24,
+                            help="Re-sign URLs that expire within this many hours")
+    arg_parser.add_argument("--all", action="store_true", help="Re-sign every URL in our bucket regardless of expiry")
+    arg_parser.add_argument("--start-after-id", type=int, default=None, help="Ignore the checkpoint and start after this id")
+    arg_parser.add_argument("--checkpoint-file", default=DEFAULT_CHECKPOINT_FILE, help="Where the last processed id is stored")
+    args = arg_parser.parse_args()
+
+    lock_conn = acquire_run_lock()
+    if lock_conn is None:
+        print("✗ Another attachment URL refresh is running")
+        sys.exit(1)
+    try:
+        start = args.start_after_id if args.start_after_id is not None else read_checkpoint(args.checkpoint_file)
+        if start:
+            print(f"Resuming after id {start}")
+        refresh_urls(
+            args.batch_size, start, args.checkpoint_file,
+            min_remaining=None if args.all else timedelta(hours=args.min_remaining_hours)
+        )
+    finally:
+        release_run_lock(lock_conn)
@@ -0,0 +1,93 @@
+from typing import List
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from models import CashflowDailyRollup, InflowEntryPayload
+
+# cashflow_daily_rollup holds one row per (company_id, inflow_form_id, mode, day)
+# with the sum and count of matching entries. The entry write endpoints apply
+# each change as a +/- delta in the same transaction as the entry itself, and
+# rebuild_daily_rollup.py recomputes it from scratch.
+
+ROLLUP_COLUMNS = ["company_id", "inflow_form_id", "mode", "day", "total_amount", "entry_count"]
+
+# Day an entry is counted on: its txn_date, or the date it was created
+ROLLUP_DAY = func.coalesce(InflowEntryPayload.txn_date, func.date(InflowEntryPayload.created_at))
+ROLLUP_MODE = func.coalesce(InflowEntryPayload.mode, "")
+
+
+def _rollup_upsert(db, values=None, source=None):
+    """
+    INSERT rows into the rollup, adding total_amount / entry_count onto rows
+    that already exist
+    """
+    table = CashflowDailyRollup.__table__
+    stmt = mysql_insert(table)
+    if source is not None:
+        stmt = stmt.from_select(ROLLUP_COLUMNS, source)
+    stmt = stmt.on_duplicate_key_update(
+        total_amount=table.c.total_amount + stmt.inserted.total_amount,
+        entry_count=table.c.entry_count + stmt.inserted.entry_count,
+    )
+    if values is not None:
+        db.execute(stmt, values)
+    else:
+        db.execute(stmt)
+
+
+def upsert_rollup_from_select(db, source):
+    """
+    Add the rows of source (selecting ROLLUP_COLUMNS, in order) to the rollup
+    """
+    _rollup_upsert(db, source=source)
+
+
+def upsert_rollup_rows(db, rows: List[dict]):
+    """
+    Add rollup deltas (dicts keyed by ROLLUP_COLUMNS) to the rollup in one executemany
+    """
+    if rows:
+        _rollup_upsert(db, values=rows)
+
+
+def apply_entry_to_rollup(db, entry_id: int, sign: int):
+    """
+    Add (sign=1) or remove (sign=-1) one entry's contribution to the rollup
+
+    Reads the entry's values from the database in the same statement, so call
+    it with sign=-1 before changing or deleting an entry and with sign=1 after
+    inserting or updating it. Pending ORM changes are flushed first.
+    """
+    db.flush()
+    source = select(
+        InflowEntryPayload.company_id,
+        InflowEntryPayload.inflow_form_id,
+        ROLLUP_MODE,
+        ROLLUP_DAY,
+        func.coalesce(InflowEntryPayload.amount, 0) * sign,
+        literal(sign),
+    ).where(InflowEntryPayload.id == entry_id)
+    upsert_rollup_from_select(db, source)
+
+
+def apply_entries_to_rollup(db, entry_ids: List[int], sign: int):
+    """
+    apply_entry_to_rollup for many entries at once, grouped in one statement
+    """
+    if not entry_ids:
+        return
+    db.flush()
+    source = (
+        select(
+            InflowEntryPayload.company_id,
+            InflowEntryPayload.inflow_form_id,
+            ROLLUP_MODE,
+            ROLLUP_DAY,
+            func.coalesce(func.sum(InflowEntryPayload.amount), 0) * sign,
+            func.count(InflowEntryPayload.id) * sign,
+        )
+        .where(InflowEntryPayload.id.in_(entry_ids))
+        .group_by(InflowEntryPayload.company_id, InflowEntryPayload.inflow_form_id, ROLLUP_MODE, ROLLUP_DAY)
+    )
+    upsert_rollup_from_select(db, source)
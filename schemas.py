@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Literal
 from datetime import date, datetime
 from models import (
     ReceiptType, ReceiptMode, PaymentPurpose, PaymentType, EmployeePaymentPurpose,
@@ -398,6 +398,32 @@ class PresignedUrlResponse(BaseModel):
     expires_in_seconds: int = 604800  # 1 week
 
 
+class AttachmentUploadRequest(BaseModel):
+    """Request for a presigned direct-to-storage upload"""
+    company_id: int = Field(..., description="Company the attachment belongs to")
+    inflow_form_id: int = Field(..., description="Inflow form the attachment belongs to")
+    file_name: str = Field(..., min_length=1, max_length=255, description="Original file name")
+    content_type: Optional[str] = Field(None, max_length=100, description="Content type the client will send")
+    method: Literal["PUT", "POST"] = Field("PUT", description="Upload with a presigned PUT URL or a POST form")
+
+
+class AttachmentUploadTarget(BaseModel):
+    """Presigned upload target; send headers (PUT) or fields (POST) unchanged"""
+    key: str
+    method: str
+    url: str
+    fields: dict = {}
+    headers: dict = {}
+    expires_in: int
+
+
+class AttachmentUploadConfirm(BaseModel):
+    """Object key of a finished direct upload to check"""
+    company_id: int
+    inflow_form_id: int
+    key: str = Field(..., min_length=1, description="Key returned by /api/attachments/presign")
+
+
 # --- Inflow Entry Schemas ---
 
 class InflowEntryAttachmentResponse(BaseModel):
@@ -405,6 +431,11 @@ class InflowEntryAttachmentResponse(BaseModel):
     id: int
     inflow_entry_id: int
     file_url: Optional[str]
+    # Downscaled JPEG renditions, for image attachments uploaded from a device
+    preview_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    status: str = "UPLOADED"  # PENDING until the background upload finishes, or FAILED
+    last_error: Optional[str] = None
     created_at: datetime
 
     class Config:
@@ -454,3 +485,24 @@ class InflowEntryEdit(BaseModel):
 class InflowEntryDelete(BaseModel):
     """Schema for deleting an inflow entry (transaction)"""
     id: int = Field(..., description="Inflow entry ID to delete")
+
+
+class InflowEntryBulkSelect(BaseModel):
+    """Entries targeted by a bulk operation: an id list and/or filters (ids, company_id or inflow_form_id is required)"""
+    ids: Optional[List[int]] = Field(None, description="Inflow entry IDs")
+    company_id: Optional[int] = Field(None, description="Only entries of this company")
+    inflow_form_id: Optional[int] = Field(None, description="Only entries of this inflow form")
+    from_date: Optional[date] = Field(None, description="Only entries with txn_date on or after this date")
+    to_date: Optional[date] = Field(None, description="Only entries with txn_date on or before this date")
+
+
+class InflowEntryBulkDelete(InflowEntryBulkSelect):
+    """Schema for deleting many inflow entries (transactions)"""
+
+
+class InflowEntryBulkEdit(InflowEntryBulkSelect):
+    """Schema for editing many inflow entries (transactions) with the same changes"""
+    payload: Optional[dict] = Field(None, description="Keys merged into every payload (shallow merge, as edit-transaction)")
+    mode: Optional[str] = Field(None, description="Mode (outside payload)")
+    bank_name: Optional[str] = Field(None, description="Bank name (outside payload)")
+    bank_account_number: Optional[str] = Field(None, description="Bank account number (outside payload)")